@@ -1,10 +1,15 @@
 from fastapi import APIRouter
 from app.services.content_serve import content_service
-from typing import Dict
+from typing import Dict, List
 
 router = APIRouter()
 
 @router.post("/process")
 def process_content(content_data: Dict):
     response = content_service.process_content(content_data)
+    return response
+
+@router.post("/process_batch")
+def process_batch_content(content_list: List[Dict]):
+    response = content_service.process_batch_content(content_list)
     return response
\ No newline at end of file
@@ -1,13 +1,21 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.services.feedback_service import feedback_log_service
-from typing import Dict
+from app.services.feedback_ingest import feedback_ingestor
+from app.models.feedback_model import FeedbackEvent
 
 router = APIRouter()
 
 @router.post("/process_metadata_update")
-def process_metadata_update(content_data: Dict):
+def process_metadata_update(feedback: FeedbackEvent):
+    event = feedback.model_dump()
+    if feedback_ingestor.is_async:
+        if not feedback_ingestor.enqueue(event):
+            raise HTTPException(status_code=503, detail="Feedback queue unavailable, retry later")
+        return JSONResponse(status_code=202, content={"message": "Metadata update accepted"})
+
     try:
-        feedback_log_service.process_metadata_update(content_data)
+        feedback_log_service.process_metadata_update(event)
         return {"message": "Metadata update processed successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
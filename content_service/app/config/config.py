@@ -5,17 +5,83 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 10000))
 KAFKA_BALANCE_INTEREST_TOPIC = os.getenv("KAFKA_BALANCE_INTEREST_TOPIC")
 KAFKA_EMBEDDING_UPDATE_TOPIC = os.getenv("KAFKA_EMBEDDING_UPDATE_TOPIC")
 KAFKA_BROKER = os.getenv("KAFKA_BROKER")
 CLASSIFIER_MODEL = os.getenv("CLASSIFIER_MODEL")
 CLASSIFICATION = os.getenv("CLASSIFICATION")
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch")
+CLASSIFIER_EXPORT_DIR = os.getenv("CLASSIFIER_EXPORT_DIR", "exported_models")
 API_KEY = os.getenv("API_KEY")
 FETCH_API_URL = os.getenv("FETCH_API_URL")
 PROCESS_API_URL = os.getenv("PROCESS_API_URL")
+PROCESS_BATCH_API_URL = os.getenv("PROCESS_BATCH_API_URL") or (f"{PROCESS_API_URL}_batch" if PROCESS_API_URL else None)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 100))
+FETCH_PAGE_SIZE = int(os.getenv("FETCH_PAGE_SIZE", 100))
+FETCH_MAX_ARTICLES = int(os.getenv("FETCH_MAX_ARTICLES", 500))
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 5))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", 30))
 CONTENT_CLASSIFY_TOPIC = os.getenv("CONTENT_CLASSIFY_TOPIC")
 CONTENT_CLASSIFY_GROUP = os.getenv("CONTENT_CLASSIFY_GROUP")
+CONTENT_CLASSIFY_MESSAGE_ITEMS = int(os.getenv("CONTENT_CLASSIFY_MESSAGE_ITEMS", 100))
+# Messages per poll / per commit on the classify topic; one message carries up to CONTENT_CLASSIFY_MESSAGE_ITEMS items
+CONTENT_CLASSIFY_POLL_RECORDS = int(os.getenv("CONTENT_CLASSIFY_POLL_RECORDS", 5))
+CONTENT_CLASSIFY_COMMIT_RECORDS = int(os.getenv("CONTENT_CLASSIFY_COMMIT_RECORDS", 1))
 KAFKA_INTERACTION_UPDATE = os.getenv("KAFKA_INTERACTION_UPDATE")
+KAFKA_FEEDBACK_TOPIC = os.getenv("KAFKA_FEEDBACK_TOPIC", "content_feedback")
+KAFKA_FEEDBACK_GROUP = os.getenv("KAFKA_FEEDBACK_GROUP", "content_feedback_group")
+KAFKA_PRODUCER_BLOCKING = os.getenv("KAFKA_PRODUCER_BLOCKING", "false").lower() == "true"
+KAFKA_PRODUCER_LINGER_MS = int(os.getenv("KAFKA_PRODUCER_LINGER_MS", 20))
+KAFKA_PRODUCER_BATCH_SIZE = int(os.getenv("KAFKA_PRODUCER_BATCH_SIZE", 65536))
+KAFKA_PRODUCER_COMPRESSION = os.getenv("KAFKA_PRODUCER_COMPRESSION", "lz4")
+KAFKA_PRODUCER_METRICS_INTERVAL = float(os.getenv("KAFKA_PRODUCER_METRICS_INTERVAL", 60))
+KAFKA_MAX_POLL_RECORDS = int(os.getenv("KAFKA_MAX_POLL_RECORDS", 100))
+KAFKA_POLL_TIMEOUT_MS = int(os.getenv("KAFKA_POLL_TIMEOUT_MS", 1000))
+KAFKA_RETRY_BACKOFF_SECONDS = float(os.getenv("KAFKA_RETRY_BACKOFF_SECONDS", 5))
+KAFKA_MAX_POLL_INTERVAL_MS = int(os.getenv("KAFKA_MAX_POLL_INTERVAL_MS", 300000))
+KAFKA_MAX_DELIVERY_ATTEMPTS = int(os.getenv("KAFKA_MAX_DELIVERY_ATTEMPTS", 5))
+KAFKA_DEAD_LETTER_SUFFIX = os.getenv("KAFKA_DEAD_LETTER_SUFFIX", ".dlq")
+
+CLASSIFY_MAX_BATCH_TOKENS = int(os.getenv("CLASSIFY_MAX_BATCH_TOKENS", 8192))
+CLASSIFY_MAX_BATCH_SIZE = int(os.getenv("CLASSIFY_MAX_BATCH_SIZE", 64))
+CLASSIFY_CHUNK_SIZE = int(os.getenv("CLASSIFY_CHUNK_SIZE", 16))
+CLASSIFY_MAX_BATCH = int(os.getenv("CLASSIFY_MAX_BATCH", 50))
+CLASSIFY_MAX_WAIT_SECONDS = float(os.getenv("CLASSIFY_MAX_WAIT_SECONDS", 10))
+CLASSIFY_QUEUE_SIZE = int(os.getenv("CLASSIFY_QUEUE_SIZE", 500))
+CLASSIFY_CONSUMERS = int(os.getenv("CLASSIFY_CONSUMERS", 2))
+CLASSIFY_EXECUTION = os.getenv("CLASSIFY_EXECUTION", "thread")
+CLASSIFY_PROCESS_WORKERS = int(os.getenv("CLASSIFY_PROCESS_WORKERS", 0))
+CLASSIFY_THREADS_PER_WORKER = int(os.getenv("CLASSIFY_THREADS_PER_WORKER", 2))
+CLASSIFY_PROCESS_START_METHOD = os.getenv("CLASSIFY_PROCESS_START_METHOD", "forkserver")
+CLASSIFY_PRETOKENIZED_HYPOTHESES = os.getenv("CLASSIFY_PRETOKENIZED_HYPOTHESES", "true").lower() == "true"
+CLASSIFY_PREFILTER_MODEL = os.getenv("CLASSIFY_PREFILTER_MODEL")
+CLASSIFY_PREFILTER_TOP_K = int(os.getenv("CLASSIFY_PREFILTER_TOP_K", 5))
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", 10000))
+FEEDBACK_FLUSH_INTERVAL_SECONDS = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_SECONDS", 2))
+FEEDBACK_FLUSH_MAX_ARTICLES = int(os.getenv("FEEDBACK_FLUSH_MAX_ARTICLES", 500))
+ENGAGEMENT_CACHE_SIZE = int(os.getenv("ENGAGEMENT_CACHE_SIZE", 10000))
+ENGAGEMENT_CACHE_TTL_SECONDS = float(os.getenv("ENGAGEMENT_CACHE_TTL_SECONDS", 60))
+ENGAGEMENT_TRIGGER_THRESHOLD = float(os.getenv("ENGAGEMENT_TRIGGER_THRESHOLD", 0.3))
+ENGAGEMENT_STATE_BACKEND = os.getenv("ENGAGEMENT_STATE_BACKEND", "local")
+ENGAGEMENT_STATE_MAX_ENTRIES = int(os.getenv("ENGAGEMENT_STATE_MAX_ENTRIES", 50000))
+ENGAGEMENT_STATE_TTL_SECONDS = float(os.getenv("ENGAGEMENT_STATE_TTL_SECONDS", 7 * 24 * 3600))
+INTEREST_WINDOW_SECONDS = float(os.getenv("INTEREST_WINDOW_SECONDS", 30))
+INTEREST_MAX_PENDING_USERS = int(os.getenv("INTEREST_MAX_PENDING_USERS", 10000))
+FEEDBACK_INGEST_MODE = os.getenv("FEEDBACK_INGEST_MODE", "sync")
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", 100))
+FEEDBACK_BATCH_WAIT_SECONDS = float(os.getenv("FEEDBACK_BATCH_WAIT_SECONDS", 0.5))
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", 10000))
+# How long a feedback request may wait on a full producer buffer / missing metadata before answering 503
+FEEDBACK_PRODUCER_MAX_BLOCK_MS = int(os.getenv("FEEDBACK_PRODUCER_MAX_BLOCK_MS", 200))
+REDIS_HOST = os.getenv("REDIS_HOST")
+REDIS_PORT = os.getenv("REDIS_PORT")
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+REDIS_SSL = os.getenv("REDIS_SSL", "true").lower() == "true"
 
 if not MONGO_URI:
     raise ValueError("MONGO_URI is not set in environment variables!")
@@ -1,7 +1,10 @@
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError, ConfigurationError
 from app.config.logger_config import logger
-from app.config.config import MONGO_URI, DB_NAME
+from app.config.config import (
+    MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+)
 
 class MongoDB:
 
@@ -12,7 +15,14 @@ class MongoDB:
 
     def _connect(self):
         try:
-            self.client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+            self.client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS
+            )
             self.db = self.client[DB_NAME]
             self.client.admin.command("ping")
             logger.info(f"Connected to MongoDB: {DB_NAME}")
@@ -1,17 +1,89 @@
 from kafka import KafkaProducer
+from kafka.errors import KafkaTimeoutError
 import json
+import threading
+import time
+from collections import defaultdict
 from app.config.logger_config import logger
-from  app.config.config import KAFKA_BROKER
+from app.config.config import (
+    KAFKA_BROKER, KAFKA_PRODUCER_BLOCKING, KAFKA_PRODUCER_LINGER_MS, KAFKA_PRODUCER_BATCH_SIZE,
+    KAFKA_PRODUCER_COMPRESSION, KAFKA_PRODUCER_METRICS_INTERVAL
+)
+
+class ProducerMetrics:
+    """Delivery latency and error counters, logged once per reporting interval."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.lock = threading.Lock()
+        self.totals = {"sent": 0, "failed": 0}
+        self._reset_window()
+
+    def _reset_window(self):
+        self.window_start = time.monotonic()
+        self.window_sent = defaultdict(int)
+        self.window_failed = defaultdict(int)
+        self.window_latency_total = 0.0
+        self.window_latency_max = 0.0
+
+    def record_success(self, topic: str, latency: float):
+        with self.lock:
+            self.totals["sent"] += 1
+            self.window_sent[topic] += 1
+            self.window_latency_total += latency
+            self.window_latency_max = max(self.window_latency_max, latency)
+            self._maybe_report()
+
+    def record_failure(self, topic: str):
+        with self.lock:
+            self.totals["failed"] += 1
+            self.window_failed[topic] += 1
+            self._maybe_report()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            sent = sum(self.window_sent.values())
+            return {
+                "total_sent": self.totals["sent"],
+                "total_failed": self.totals["failed"],
+                "window_sent": dict(self.window_sent),
+                "window_failed": dict(self.window_failed),
+                "window_avg_latency_ms": (self.window_latency_total / sent * 1000) if sent else 0.0,
+                "window_max_latency_ms": self.window_latency_max * 1000,
+            }
+
+    def _maybe_report(self):
+        if time.monotonic() - self.window_start < self.interval_seconds:
+            return
+        sent = sum(self.window_sent.values())
+        failed = sum(self.window_failed.values())
+        avg_latency = (self.window_latency_total / sent * 1000) if sent else 0.0
+        logger.info(
+            f"Kafka producer metrics: sent={sent}, failed={failed}, "
+            f"avg_delivery_latency={avg_latency:.1f}ms, max_delivery_latency={self.window_latency_max * 1000:.1f}ms, "
+            f"per_topic_sent={dict(self.window_sent)}, per_topic_failed={dict(self.window_failed)}"
+        )
+        self._reset_window()
+
 
 class KafkaEventProducer:
-    def __init__(self):
+    def __init__(self, blocking: bool = KAFKA_PRODUCER_BLOCKING, max_block_ms: int = 60000):
+        self.blocking = blocking
+        self.metrics = ProducerMetrics(KAFKA_PRODUCER_METRICS_INTERVAL)
         try:
             self.producer = KafkaProducer(
                 bootstrap_servers=KAFKA_BROKER,
                 value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-                retries=5
+                retries=5,
+                linger_ms=KAFKA_PRODUCER_LINGER_MS,
+                batch_size=KAFKA_PRODUCER_BATCH_SIZE,
+                compression_type=KAFKA_PRODUCER_COMPRESSION or None,
+                max_block_ms=max_block_ms
+            )
+            logger.info(
+                f"Kafka Producer connected successfully (blocking={blocking}, linger_ms={KAFKA_PRODUCER_LINGER_MS}, "
+                f"batch_size={KAFKA_PRODUCER_BATCH_SIZE}, compression={KAFKA_PRODUCER_COMPRESSION or 'none'})."
             )
-            logger.info("Kafka Producer connected successfully.")
         except Exception as e:
             logger.error(f"Kafka Producer Connection Error: {e}")
             self.producer = None
@@ -21,12 +93,64 @@ class KafkaEventProducer:
             logger.error("Kafka Producer is not connected. Message not sent.")
             return
 
+        start = time.perf_counter()
         try:
             future = self.producer.send(topic, message)
+        except Exception as e:
+            self.metrics.record_failure(topic)
+            logger.error(f"Error sending message to '{topic}': {e}")
+            return
+
+        if not self.blocking:
+            # Delivery is reported from the producer's I/O thread; batching and linger happen there
+            future.add_callback(self._on_delivery, topic, start)
+            future.add_errback(self._on_error, topic)
+            return
+
+        try:
             future.get(timeout=10)
+            self.metrics.record_success(topic, time.perf_counter() - start)
             logger.info(f"Message sent to '{topic}': {message}")
-            self.producer.flush()
         except Exception as e:
+            self.metrics.record_failure(topic)
             logger.error(f"Error sending message to '{topic}': {e}")
-            
-kafka_event_producer = KafkaEventProducer()
\ No newline at end of file
+
+    def try_send(self, topic, message) -> bool:
+        """Non-blocking send for request paths: False if the buffer is full or metadata is unavailable within max_block_ms."""
+        if not self.producer:
+            return False
+
+        start = time.perf_counter()
+        try:
+            future = self.producer.send(topic, message)
+        except (KafkaTimeoutError, BufferError) as e:
+            self.metrics.record_failure(topic)
+            logger.warning(f"Kafka producer could not accept message for '{topic}': {e}")
+            return False
+
+        future.add_callback(self._on_delivery, topic, start)
+        future.add_errback(self._on_error, topic)
+        return True
+
+    def _on_delivery(self, topic, start, record_metadata):
+        self.metrics.record_success(topic, time.perf_counter() - start)
+
+    def _on_error(self, topic, exc):
+        self.metrics.record_failure(topic)
+        logger.error(f"Error delivering message to '{topic}': {exc}")
+
+    def flush(self, timeout=None):
+        if self.producer:
+            self.producer.flush(timeout=timeout)
+
+    def close(self, timeout=10):
+        if not self.producer:
+            return
+        try:
+            self.producer.flush(timeout=timeout)
+            self.producer.close(timeout=timeout)
+            logger.info(f"Kafka Producer closed. Metrics: {self.metrics.snapshot()}")
+        except Exception as e:
+            logger.error(f"Error closing Kafka Producer: {e}")
+
+kafka_event_producer = KafkaEventProducer()
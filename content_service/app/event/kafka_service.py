@@ -3,66 +3,112 @@ import time
 from app.config.logger_config import logger
 from app.event.kafka_producer import kafka_event_producer
 from app.services.content_serve import content_service
-from collections import defaultdict
-from app.config.config import KAFKA_BALANCE_INTEREST_TOPIC,KAFKA_EMBEDDING_UPDATE_TOPIC,KAFKA_INTERACTION_UPDATE
+from collections import defaultdict, OrderedDict
+from app.services.interaction_counter import engagement_score, interaction_counters
+from app.services.engagement_state import create_engagement_state_store
+from app.services.interest_aggregator import interest_aggregator
+from app.config.config import KAFKA_EMBEDDING_UPDATE_TOPIC,KAFKA_INTERACTION_UPDATE,ENGAGEMENT_CACHE_SIZE,ENGAGEMENT_CACHE_TTL_SECONDS,ENGAGEMENT_TRIGGER_THRESHOLD
 
 class ContentServiceKafkaHandler:
     def __init__(self):
         self.content_service = content_service
         self.embedding_update_producer = kafka_event_producer
-        self.article_engagement_scores = {}
+        self.engagement_state = create_engagement_state_store()
+        self.interest_aggregator = interest_aggregator
+        self.interaction_counters = interaction_counters
+        self.article_cache = OrderedDict()
+        self.article_cache_size = ENGAGEMENT_CACHE_SIZE
         self.lock = threading.Lock()
 
-    def batch_compute_and_trigger_updates(self, article_ids,email):
-        if not article_ids:
+    def _load_articles(self, article_ids, applied_deltas):
+        """Category, tags and engagement score per article; only cache misses hit Mongo.
+
+        Entries are re-read once they are ``ENGAGEMENT_CACHE_TTL_SECONDS`` old,
+        so the score picks up counters flushed by other replicas instead of
+        only growing by this replica's own deltas. A re-read score adds this
+        replica's unflushed write-behind deltas, minus ``applied_deltas`` (the
+        current batch, which the caller adds itself).
+        """
+        stale_before = time.monotonic() - ENGAGEMENT_CACHE_TTL_SECONDS
+        with self.lock:
+            cached = {
+                article_id: self.article_cache[article_id]
+                for article_id in article_ids
+                if article_id in self.article_cache and self.article_cache[article_id]["loaded_at"] >= stale_before
+            }
+            for article_id in cached:
+                self.article_cache.move_to_end(article_id)
+
+        # Articles still waiting for classification are re-read until they have a category
+        missing = [article_id for article_id in article_ids if not cached.get(article_id, {}).get("category")]
+        if missing:
+            docs = self.content_service.find(
+                {"_id": {"$in": missing}},
+                {"category": 1, "tags": 1, "interactionMetrics": 1}
+            )
+            pending_scores = self.interaction_counters.pending_scores([doc["_id"] for doc in docs])
+            loaded_at = time.monotonic()
+            with self.lock:
+                for doc in docs:
+                    entry = {
+                        "engagement_score": (
+                            engagement_score(doc.get("interactionMetrics") or {})
+                            + pending_scores.get(doc["_id"], 0.0)
+                            - applied_deltas.get(doc["_id"], 0.0)
+                        ),
+                        "category": doc.get("category", ""),
+                        "tags": doc.get("tags", []),
+                        "loaded_at": loaded_at
+                    }
+                    self.article_cache[doc["_id"]] = entry
+                    self.article_cache.move_to_end(doc["_id"])
+                    cached[doc["_id"]] = entry
+                while len(self.article_cache) > self.article_cache_size:
+                    self.article_cache.popitem(last=False)
+
+        return cached
+
+    def batch_compute_and_trigger_updates(self, article_interactions, email):
+        """``article_interactions`` is a list of ``(article_id, interaction)`` pairs.
+
+        Scores are cached in-process and advanced by each interaction's delta,
+        so the change trigger needs no database read until the entry goes stale.
+        """
+        if not article_interactions:
             logger.info("No article IDs provided. Skipping batch processing.")
             return
-        
-        logger.info("batch computing checking: ")
-        
-        pipeline = [
-            {"$match": {"_id": {"$in": article_ids}}},
-            {"$project": {
-                "_id": 1,
-                "interactionMetrics": 1,
-                "category": 1,
-                "tags": 1,
-                "engagement_score": {
-                    "$sum": [
-                        {"$multiply": ["$interactionMetrics.likes", 0.4]},
-                        {"$multiply": ["$interactionMetrics.shares", 0.3]},
-                        {"$multiply": ["$interactionMetrics.clicks", 0.3]}
-                    ]
-                }
-            }}
-        ]
-        
-        articles_scores = self.content_service.aggregation(pipeline)
-        if not articles_scores:
+
+        article_deltas = defaultdict(float)
+        for article_id, interaction in article_interactions:
+            article_deltas[article_id] += engagement_score(interaction)
+
+        # The batch's deltas are already in the write-behind buffer
+        articles = self._load_articles(list(article_deltas), article_deltas)
+        if not articles:
             logger.info("No articles found for the given IDs.")
             return
-        
-        logger.info("Computing user interest from engagement data...")
-        self.compute_user_interest(email, articles_scores)
-        
-        print("article_scores",articles_scores)
-        batch_updates = []
-        now = time.time()
 
-        for score_data in articles_scores:
-            article_id = str(score_data["_id"])
-            new_score = score_data["engagement_score"]
+        deltas = {str(article_id): delta for article_id, delta in article_deltas.items() if article_id in articles}
+        with self.lock:
+            for article_id, delta in article_deltas.items():
+                if article_id in articles:
+                    articles[article_id]["engagement_score"] += delta
+            articles_scores = [{"_id": article_id, **entry} for article_id, entry in articles.items()]
 
-            last_score,last_update_time = self.article_engagement_scores.get(article_id, (0, 0))
-            score_change = (new_score - last_score) / max(1, last_score)  if last_score > 0 else new_score
+        logger.info("Computing user interest from engagement data...")
+        self.compute_user_interest(email, articles_scores)
 
-            if score_change > 0.3:
-                batch_updates.append({
-                    "id": article_id,
-                    "category": score_data.get("category", ""),
-                    "tags": score_data.get("tags", [])
-                })
-                self.article_engagement_scores[article_id] = (new_score, now)
+        scores = {str(score_data["_id"]): score_data["engagement_score"] for score_data in articles_scores}
+        triggered = set(self.engagement_state.should_trigger(scores, deltas, ENGAGEMENT_TRIGGER_THRESHOLD))
+        batch_updates = [
+            {
+                "id": str(score_data["_id"]),
+                "category": score_data.get("category", ""),
+                "tags": score_data.get("tags", [])
+            }
+            for score_data in articles_scores
+            if str(score_data["_id"]) in triggered
+        ]
 
         if batch_updates:
             self.trigger_batch_embedding_update(batch_updates)
@@ -87,17 +133,7 @@ class ContentServiceKafkaHandler:
                 category_weights[tag] += 0.4
                 category_counts[tag] += 1
         
-        for topic in category_weights:
-            if category_counts[topic] > 0:
-                category_weights[topic] /= category_counts[topic]
-        
-        user_interest = [{"topic": topic, "weight": weight} for topic, weight in category_weights.items()]
-        
-        interest_payload = {
-            "email": email,
-            "updatedInterest": user_interest
-        }
-        print("Producer user_interest produced happend")
-        self.embedding_update_producer.send(KAFKA_BALANCE_INTEREST_TOPIC,interest_payload)
+        # Averaged and published once per user per window by the aggregator
+        self.interest_aggregator.add(email, category_weights, category_counts)
 
 content_kafka_service = ContentServiceKafkaHandler()
\ No newline at end of file
@@ -5,21 +5,35 @@ import threading
 import asyncio
 from app.api.content import router as content_api
 from app.event.kafka_service import content_kafka_service
+from app.event.kafka_producer import kafka_event_producer
 from app.api.feedback import router as feedback_api
 from app.services.new_scheduler import scheduler
+from app.services.interaction_counter import interaction_counters
+from app.services.interest_aggregator import interest_aggregator
+from app.services.feedback_ingest import feedback_ingestor
 from app.services.category_generation import ContentKafkaListener
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Content Service Starting...")
+    content_kafka_service.engagement_state.load_snapshot()
     kafka_listener = ContentKafkaListener()
     kafka_listener.start_listeners()
+    interaction_counters.start()
+    interest_aggregator.start()
+    feedback_ingestor.start()
 
     scheduler_thread = threading.Thread(target=scheduler.start_scheduler, daemon=True)
     scheduler_thread.start()
 
     yield
     logger.info("Content Service Shutting Down...")
+    kafka_listener.stop()
+    feedback_ingestor.stop()
+    interaction_counters.stop()
+    interest_aggregator.stop()
+    content_kafka_service.engagement_state.save_snapshot()
+    kafka_event_producer.close()
 
 app = FastAPI(title="Content Service", lifespan=lifespan)
 
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class Interaction(BaseModel):
+    likes: int = 0
+    shares: int = 0
+    clicks: int = 0
+
+class ArticleFeedback(BaseModel):
+    id: str
+    interaction: Interaction
+
+class FeedbackEvent(BaseModel):
+    email: str = Field(min_length=1)
+    articles: List[ArticleFeedback] = Field(min_length=1)
@@ -1,214 +1,120 @@
-from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
-import torch
-from typing import List, Tuple,Dict
 from pymongo import UpdateOne
 from bson import ObjectId
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+import math
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from app.db.mongo import mongo_db
-from app.config.config import CLASSIFIER_MODEL,CLASSIFICATION,CONTENT_CLASSIFY_TOPIC,CONTENT_CLASSIFY_GROUP
+from app.config.config import (
+    CLASSIFIER_MODEL, CLASSIFICATION, CONTENT_CLASSIFY_TOPIC, CONTENT_CLASSIFY_GROUP, CLASSIFY_CHUNK_SIZE,
+    CLASSIFY_MAX_BATCH, CLASSIFY_MAX_WAIT_SECONDS, CLASSIFY_QUEUE_SIZE, CLASSIFY_CONSUMERS,
+    CLASSIFY_EXECUTION, CLASSIFY_PROCESS_WORKERS, CLASSIFY_THREADS_PER_WORKER, CLASSIFY_PROCESS_START_METHOD,
+    CONTENT_CLASSIFY_POLL_RECORDS, CONTENT_CLASSIFY_COMMIT_RECORDS
+)
 from app.event.kafka_consumer import KafkaEventConsumer
 from app.config.logger_config import logger
 from app.event.kafka_service import content_kafka_service
-import os
-
-class ContentClassifier:
-    def __init__(self, model_name: str, classification_type: str, confidence_threshold: float = 0.5):
-        self.confidence_threshold = confidence_threshold
-
-        self.categories = [
-            "Gaming", "Finance", "Business", "Healthcare", "Science", "Education", "Psychology",
-            "Marketing", "Politics", "Entertainment", "Sports", "Travel", "Sustainability", "Technology"
-        ]
-        
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.model = torch.quantization.quantize_dynamic(
-            self.model, {torch.nn.Linear}, dtype=torch.qint8
-        )
-        self.model = self.model.to("cpu")
-        self.model.eval()
-        self.device = "cpu"
-
-    def classify(self, texts: List[str]) -> List[Dict]:
-        total_start = time.perf_counter()
-        results = []
+from app.services.classification_cache import ClassificationCache
+from app.services.content_classifier import (
+    ContentClassifier, available_cores, init_classify_process, classify_in_process, process_ready
+)
+from app.services.micro_batcher import MicroBatcher
 
-        for idx, text in enumerate(texts):
-            section_times = {}
-
-            # Section 1: Hypothesis & Premise
-            t0 = time.perf_counter()
-            hypotheses = [f"This text is about {category}." for category in self.categories]
-            premises = [text] * len(hypotheses)
-            section_times["hypothesis"] = time.perf_counter() - t0
-
-            # Section 2: Tokenization
-            t1 = time.perf_counter()
-            inputs = self.tokenizer(
-                premises,
-                hypotheses,
-                return_tensors="pt",
-                padding=True,
-                truncation=True
-            ).to(self.device)
-            section_times["tokenize"] = time.perf_counter() - t1
-
-            # Section 3: Inference
-            t2 = time.perf_counter()
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
-            section_times["inference"] = time.perf_counter() - t2
-
-            # Section 4: Score Computation
-            t3 = time.perf_counter()
-            entail_contra_logits = logits[:, [0, 2]]
-            probs = torch.softmax(entail_contra_logits, dim=1)
-            entailment_scores = probs[:, 1]
-            section_times["compute_scores"] = time.perf_counter() - t3
-
-            # Section 5: Filtering + Fallback
-            t4 = time.perf_counter()
-            label_scores = [
-                {"label": category, "score": score.item()}
-                for category, score in zip(self.categories, entailment_scores)
-                if score.item() >= self.confidence_threshold
-            ]
+class ClassifyWorker:
+    def __init__(self, content_collection, classifier: ContentClassifier, classification_cache: ClassificationCache):
+        self.collection = content_collection
+        self.classifier = classifier
+        self.classification_cache = classification_cache
+        self.content_kafka_service = content_kafka_service
 
-            if not label_scores:
-                max_score_idx = torch.argmax(entailment_scores).item()
-                label_scores = [{
-                    "label": self.categories[max_score_idx],
-                    "score": entailment_scores[max_score_idx].item()
-                }]
-            label_scores.sort(key=lambda x: x["score"], reverse=True)
-            section_times["filter_fallback"] = time.perf_counter() - t4
-
-            # Section 6: Format Results
-            t5 = time.perf_counter()
-            results.append({
-                "sequence": text,
-                "labels": [entry["label"] for entry in label_scores],
-                "scores": [entry["score"] for entry in label_scores]
-            })
-            section_times["format"] = time.perf_counter() - t5
+        self.pool_lock = threading.Lock()
+        if CLASSIFY_EXECUTION == "process":
+            self.executor, self.num_workers = self._create_process_pool()
+            self.classify_fn = classify_in_process
+        else:
+            self.num_workers = 2
+            self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+            self.classify_fn = self.classifier.classify
+
+        self.batcher = MicroBatcher(
+            handler=self.classify_and_update,
+            max_batch_size=CLASSIFY_MAX_BATCH,
+            max_wait_seconds=CLASSIFY_MAX_WAIT_SECONDS,
+            max_queue_size=CLASSIFY_QUEUE_SIZE,
+            num_consumers=CLASSIFY_CONSUMERS,
+            name="classify-batcher"
+        )
 
-            logger.info(
-                f"Text {idx + 1}/{len(texts)} processed. Times: "
-                + ", ".join([f"{k}={v:.4f}s" for k, v in section_times.items()])
-            )
+    def _create_process_pool(self):
+        threads_per_worker = max(1, CLASSIFY_THREADS_PER_WORKER)
+        num_workers = CLASSIFY_PROCESS_WORKERS or max(1, available_cores() // threads_per_worker)
 
-        total_end = time.perf_counter()
-        logger.info(f"classify() completed on {len(texts)} texts in {total_end - total_start:.2f} seconds")
+        executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context(CLASSIFY_PROCESS_START_METHOD),
+            initializer=init_classify_process,
+            initargs=(threads_per_worker,)
+        )
 
-        return results
+        # Start every worker and load its model now rather than on the first batch
+        worker_pids = set(executor.map(process_ready, range(num_workers * 4)))
+        logger.info(
+            f"Classification process pool ready: {num_workers} workers x {threads_per_worker} torch threads "
+            f"({CLASSIFY_PROCESS_START_METHOD}), pids={sorted(worker_pids)}"
+        )
+        return executor, num_workers
 
-    
-    """Batch inference and classifying"""
-    # def classify(self, texts: List[str]) -> List[Dict]:
-    #     t0 = time.perf_counter()
-    #     all_premises = []
-    #     all_hypotheses = []
-    #     index_map = []  # track which output goes to which text
-
-    #     # Prepare flattened input for batch processing
-    #     for idx, text in enumerate(texts):
-    #         for label in self.categories:
-    #             all_premises.append(text)
-    #             all_hypotheses.append(f"This text is about {label}.")
-    #             index_map.append(idx)  # keep track of original text index
-
-    #     t1 = time.perf_counter()
-    #     # Tokenize all at once
-    #     inputs = self.tokenizer(
-    #         all_premises,
-    #         all_hypotheses,
-    #         return_tensors="pt",
-    #         padding=True,
-    #         truncation=True,
-    #         max_length=	512
-    #     ).to(self.device)
-
-    #     t2 = time.perf_counter()
-    #     # Run inference in a single pass
-    #     with torch.no_grad():
-    #         logits = self.model(**inputs).logits
-
-    #     t3 = time.perf_counter()
-    #     entail_contra_logits = logits[:, [0, 2]]
-    #     probs = torch.softmax(entail_contra_logits, dim=1)
-    #     entailment_scores = probs[:, 1]  # score for "entailment"
-
-    #     t4 = time.perf_counter()
-    #     # Organize results per input text
-    #     results_dict = {i: [] for i in range(len(texts))}
-
-    #     for idx, label_idx in enumerate(index_map):
-    #         score = entailment_scores[idx].item()
-    #         label = self.categories[idx % len(self.categories)]
-    #         if score >= self.confidence_threshold:
-    #             results_dict[label_idx].append({"label": label, "score": score})
-
-    #     t5 = time.perf_counter()
-    #     # Sort results and format output
-    #     final_results = []
-    #     for i, text in enumerate(texts):
-    #         label_scores = sorted(results_dict[i], key=lambda x: x["score"], reverse=True)
-            
-    #         if not label_scores:
-    #             fallback_scores = [
-    #                 (label, entailment_scores[j].item())
-    #                 for j, (t_idx, label) in enumerate(zip(index_map, [self.categories[k % len(self.categories)] for k in range(len(entailment_scores))]))
-    #                 if t_idx == i
-    #             ]
-    #             if fallback_scores:
-    #                 best_label, best_score = max(fallback_scores, key=lambda x: x[1])
-    #                 logger.warning(f"No confident label for: \"{text}\" — fallback to top label: {best_label}")
-    #                 label_scores = [{"label": best_label, "score": best_score}]
-
-    #             final_results.append({
-    #                 "sequence": text,
-    #                 "labels": [entry["label"] for entry in label_scores],
-    #                 "scores": [entry["score"] for entry in label_scores]
-    #             })
-            
-    #     t6 = time.perf_counter()
-    #     logger.info(f"Preparation Time     : {t1 - t0:.4f} sec")
-    #     logger.info(f"Tokenization Time    : {t2 - t1:.4f} sec")
-    #     logger.info(f"Inference Time       : {t3 - t2:.4f} sec")
-    #     logger.info(f"Softmax + Extraction : {t4 - t3:.4f} sec")
-    #     logger.info(f"Filtering Time       : {t5 - t4:.4f} sec")
-    #     logger.info(f"Sorting + Formatting : {t6 - t5:.4f} sec")
-    #     logger.info(f"Total Classify Time  : {t6 - t0:.4f} sec")
-
-    #     return final_results
+    def shutdown(self):
+        self.batcher.stop()
+        self.executor.shutdown(wait=True)
 
-class ClassifyWorker:
-    def __init__(self, content_collection, classifier: ContentClassifier):
-        self.buffer = []
-        self.buffer_lock = threading.Lock()
-        self.flush_interval = 10
-        self.batch_size = 50
-        self.collection = content_collection
-        self.classifier = classifier
-        self.content_kafka_service = content_kafka_service
-        self.executor = ThreadPoolExecutor(max_workers=2)
+    def start(self):
+        self.batcher.start()
 
-    def add_to_buffer(self, item):
-        with self.buffer_lock:
-            self.buffer.append(item)
-            if len(self.buffer) >= self.batch_size:
-                self.flush()
+    def submit(self, item):
+        return self.batcher.submit(item)
 
-    def flush(self):
-        with self.buffer_lock:
-            if not self.buffer:
+    def _rebuild_process_pool(self, broken_executor):
+        # A worker died (OOM, segfault); the executor refuses all further work until replaced
+        with self.pool_lock:
+            if self.executor is not broken_executor:
                 return
-            buffer_copy = self.buffer.copy()
-            self.buffer.clear()
+            logger.error("Classification process pool is broken, rebuilding it")
+            broken_executor.shutdown(wait=False, cancel_futures=True)
+            self.executor, self.num_workers = self._create_process_pool()
+
+    def classify_texts(self, texts):
+        """Classifies ``texts`` in chunks; raises if any chunk fails so the caller can retry the batch."""
+        # Spread the texts over all workers, but never exceed the configured chunk size
+        batch_size = max(1, min(CLASSIFY_CHUNK_SIZE, math.ceil(len(texts) / self.num_workers)))
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        executor = self.executor
+        try:
+            futures = [executor.submit(self.classify_fn, batch) for batch in batches]
+        except BrokenProcessPool:
+            self._rebuild_process_pool(executor)
+            raise
 
-        threading.Thread(target=self.classify_and_update, args=(buffer_copy,), daemon=True).start()
+        results = []
+        failure = None
+        for idx, future in enumerate(futures, start=1):
+            try:
+                results.extend(future.result())
+                logger.info(f"Batch {idx}/{len(batches)} processed successfully")
+            except BrokenProcessPool as batch_error:
+                failure = failure or batch_error
+            except Exception as batch_error:
+                logger.warning(f"Batch {idx} failed during classification: {batch_error}", exc_info=True)
+                failure = failure or batch_error
+
+        if isinstance(failure, BrokenProcessPool):
+            self._rebuild_process_pool(executor)
+        if failure:
+            raise failure
+        return results
 
     def classify_and_update(self, buffer):
         if not buffer:
@@ -219,22 +125,27 @@ class ClassifyWorker:
             start_time = time.perf_counter()
             logger.info(f"Starting classify_and_update for {len(buffer)} items")
 
-            texts = [f"{item['title']}. {item['desc']}" for item in buffer]
-            batch_size = 4
-            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+            cache_keys = [
+                self.classification_cache.content_hash(item.get("title"), item.get("desc"))
+                for item in buffer
+            ]
+            cached_results = self.classification_cache.get_many(cache_keys)
 
-            results = []
-            futures = [self.executor.submit(self.classifier.classify, batch) for batch in batches]
+            pending = {}
+            for item, key in zip(buffer, cache_keys):
+                if key not in cached_results and key not in pending:
+                    pending[key] = f"{item['title']}. {item['desc']}"
 
-            for idx, future in enumerate(futures, start=1):
-                try:
-                    res = future.result()
-                    results.extend(res)
-                    logger.info(f"Batch {idx}/{len(batches)} processed successfully")
-                except Exception as batch_error:
-                    logger.warning(f"Batch {idx} failed during classification: {batch_error}", exc_info=True)
-                    failed_batch = batches[idx - 1]
-                    results.extend([{"sequence": text, "labels": [], "scores": []} for text in failed_batch])
+            logger.info(f"Classification cache: {len(buffer) - len(pending)} hits, {len(pending)} to classify")
+
+            fresh_results = dict(zip(pending.keys(), self.classify_texts(list(pending.values()))))
+            self.classification_cache.put_many({
+                key: {"labels": result["labels"], "scores": result["scores"]}
+                for key, result in fresh_results.items()
+                if result.get("labels")
+            })
+
+            results = [cached_results.get(key) or fresh_results[key] for key in cache_keys]
 
             operations = []
             batch_updates = []
@@ -259,10 +170,16 @@ class ClassifyWorker:
                         {"$set": {"category": category, "tags": tags}}
                     ))
 
+                    # Card fields let the user service render recommendations without reading this database
                     batch_updates.append({
                         "id": str(item["id"]),
                         "category": category,
-                        "tags": tags
+                        "tags": tags,
+                        "title": item.get("title"),
+                        "description": item.get("desc"),
+                        "url": item.get("url"),
+                        "image_link": item.get("image_link"),
+                        "published_at": item.get("published_at")
                     })
 
                 except Exception as item_error:
@@ -285,13 +202,16 @@ class ClassifyWorker:
 
         except Exception as e:
             logger.error(f"Error during classify_and_update: {str(e)}", exc_info=True)
+            raise
 
 class ContentKafkaListener:
     def __init__(self):
         self.content_collection = mongo_db.get_collection("content")
 
-        self.classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION)
-        self.classify_worker = ClassifyWorker(self.content_collection, self.classifier)
+        # Process mode classifies in the workers; the parent does not need its own copy of the model
+        self.classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION) if CLASSIFY_EXECUTION != "process" else None
+        self.classification_cache = ClassificationCache(ContentClassifier.namespace_for(CLASSIFIER_MODEL))
+        self.classify_worker = ClassifyWorker(self.content_collection, self.classifier, self.classification_cache)
 
         self.content_consumer = KafkaEventConsumer(
             topic=CONTENT_CLASSIFY_TOPIC,
@@ -300,20 +220,31 @@ class ContentKafkaListener:
 
     def start_listeners(self):
         logger.info("Starting Kafka listener for content classification")
-        
+        self.classify_worker.start()
+
         listener_thread = threading.Thread(target=self.content_listener, daemon=True)
         listener_thread.start()
 
-        flush_thread = threading.Thread(target=self.periodic_flush, daemon=True)
-        flush_thread.start()
-
     def content_listener(self):
-        self.content_consumer.listen(self.process_content)
+        # Small polls, committed per message: a poll never outlasts max_poll_interval_ms and a restart replays at most one message
+        self.content_consumer.listen_batch(
+            self.process_content_batch,
+            max_records=CONTENT_CLASSIFY_POLL_RECORDS,
+            chunk_size=CONTENT_CLASSIFY_COMMIT_RECORDS
+        )
 
     def process_content(self, data):
-        self.classify_worker.add_to_buffer(data)
+        return self.classify_worker.submit(data)
+
+    def process_content_batch(self, messages):
+        # Batched ingest publishes {"items": [...]}, single ingest publishes one item per message
+        items = [item for data in messages for item in (data["items"] if "items" in data else [data])]
+
+        # Offsets are committed once every item of the chunk is classified and written
+        futures = [self.process_content(item) for item in items]
+        for future in futures:
+            future.result()
 
-    def periodic_flush(self):
-        while True:
-            time.sleep(self.classify_worker.flush_interval)
-            self.classify_worker.flush()
\ No newline at end of file
+    def stop(self):
+        self.content_consumer.stop()
+        self.classify_worker.shutdown()
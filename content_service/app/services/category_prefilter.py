@@ -0,0 +1,36 @@
+import numpy as np
+from typing import List
+from app.config.logger_config import logger
+
+class CategoryPrefilter:
+    """First stage of the classification cascade.
+
+    Texts are embedded with a small sentence-embedding model and compared to
+    one centroid per category; only the ``top_k`` closest categories are
+    passed on to the NLI model.
+    """
+
+    def __init__(self, model_name: str, categories: List[str], top_k: int):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.categories = categories
+        self.top_k = max(1, min(top_k, len(categories)))
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+        prompts = [
+            [category, f"News about {category}.", f"This text is about {category}."]
+            for category in categories
+        ]
+        flat_prompts = [prompt for category_prompts in prompts for prompt in category_prompts]
+        prompt_embeddings = self.model.encode(flat_prompts, normalize_embeddings=True, convert_to_numpy=True)
+
+        centroids = prompt_embeddings.reshape(len(categories), len(prompts[0]), -1).mean(axis=1)
+        self.centroids = (centroids / np.linalg.norm(centroids, axis=1, keepdims=True)).astype(np.float32)
+        logger.info(f"Category prefilter ready: {model_name}, top_k={self.top_k}")
+
+    def candidates(self, texts: List[str]) -> List[List[int]]:
+        text_embeddings = self.model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        similarities = text_embeddings @ self.centroids.T
+        top = np.argsort(-similarities, axis=1)[:, :self.top_k]
+        return top.tolist()
@@ -0,0 +1,90 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from app.db.mongo import mongo_db
+from app.config.logger_config import logger
+from app.config.config import CLASSIFICATION_CACHE_SIZE
+
+class ClassificationCache:
+    """Classification results keyed by a normalized hash of title + description.
+
+    An in-process LRU sits in front of the ``classification_cache`` Mongo
+    collection, so re-fetched and syndicated articles skip the model.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = CLASSIFICATION_CACHE_SIZE):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.collection = mongo_db.get_collection("classification_cache")
+        self.local_cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def content_hash(self, title: str, description: str) -> str:
+        normalized = "\n".join(
+            re.sub(r"\s+", " ", (value or "")).strip().lower()
+            for value in (title, description)
+        )
+        return hashlib.sha256(f"{self.namespace}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        hits = {}
+        misses = []
+
+        with self.lock:
+            for key in keys:
+                if key in self.local_cache:
+                    self.local_cache.move_to_end(key)
+                    hits[key] = self.local_cache[key]
+                elif key not in misses:
+                    misses.append(key)
+
+        if misses and self.collection is not None:
+            try:
+                stored = {
+                    doc["_id"]: {"labels": doc["labels"], "scores": doc["scores"]}
+                    for doc in self.collection.find({"_id": {"$in": misses}}, {"labels": 1, "scores": 1})
+                }
+            except PyMongoError as e:
+                logger.warning(f"Classification cache lookup failed: {e}")
+                stored = {}
+
+            hits.update(stored)
+            self._remember(stored)
+
+        return hits
+
+    def put_many(self, results: Dict[str, Dict]):
+        if not results:
+            return
+
+        self._remember(results)
+
+        if self.collection is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {"$set": {"labels": result["labels"], "scores": result["scores"], "updated_at": now}},
+                upsert=True
+            )
+            for key, result in results.items()
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.warning(f"Classification cache write failed: {e}")
+
+    def _remember(self, results: Dict[str, Dict]):
+        with self.lock:
+            for key, result in results.items():
+                self.local_cache[key] = result
+                self.local_cache.move_to_end(key)
+            while len(self.local_cache) > self.max_entries:
+                self.local_cache.popitem(last=False)
@@ -0,0 +1,269 @@
+import os
+import time
+from typing import List, Tuple, Dict
+import torch
+from transformers import AutoTokenizer
+from app.config.config import (
+    CLASSIFIER_MODEL, CLASSIFICATION, CLASSIFIER_BACKEND, CLASSIFIER_EXPORT_DIR,
+    CLASSIFY_MAX_BATCH_TOKENS, CLASSIFY_MAX_BATCH_SIZE,
+    CLASSIFY_PRETOKENIZED_HYPOTHESES, CLASSIFY_PREFILTER_MODEL, CLASSIFY_PREFILTER_TOP_K
+)
+from app.config.logger_config import logger
+from app.services.category_prefilter import CategoryPrefilter
+from app.services.inference_backend import create_backend, backend_class
+
+# Kept free of Mongo/Kafka imports: process-pool workers started with "spawn" or
+# "forkserver" import this module to run the initializer below, and must not open
+# their own clients.
+
+class ContentClassifier:
+    CATEGORIES = [
+        "Gaming", "Finance", "Business", "Healthcare", "Science", "Education", "Psychology",
+        "Marketing", "Politics", "Entertainment", "Sports", "Travel", "Sustainability", "Technology"
+    ]
+
+    def __init__(
+        self,
+        model_name: str,
+        classification_type: str,
+        confidence_threshold: float = 0.5,
+        max_batch_tokens: int = CLASSIFY_MAX_BATCH_TOKENS,
+        max_batch_size: int = CLASSIFY_MAX_BATCH_SIZE,
+        pretokenized_hypotheses: bool = CLASSIFY_PRETOKENIZED_HYPOTHESES,
+        prefilter_model: str = CLASSIFY_PREFILTER_MODEL,
+        prefilter_top_k: int = CLASSIFY_PREFILTER_TOP_K,
+        backend: str = CLASSIFIER_BACKEND,
+        export_dir: str = CLASSIFIER_EXPORT_DIR
+    ):
+        self.model_name = model_name
+        self.confidence_threshold = confidence_threshold
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.pretokenized_hypotheses = pretokenized_hypotheses
+
+        self.backend_name = backend
+        self.categories = list(self.CATEGORIES)
+        self.hypotheses = [f"This text is about {category}." for category in self.categories]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Hypotheses never change, so they are encoded once and spliced onto each premise
+        self.hypothesis_ids = self.tokenizer(self.hypotheses, add_special_tokens=False)["input_ids"]
+        self.pair_special_tokens = self.tokenizer.num_special_tokens_to_add(pair=True)
+        self.backend = create_backend(backend, model_name, export_dir)
+        self.device = "cpu"
+
+        # Optional cascade: cheap embedding similarity picks the categories worth an NLI pass
+        self.prefilter = (
+            CategoryPrefilter(prefilter_model, self.categories, prefilter_top_k)
+            if prefilter_model else None
+        )
+
+    @classmethod
+    def namespace_for(
+        cls,
+        model_name: str,
+        confidence_threshold: float = 0.5,
+        prefilter_model: str = CLASSIFY_PREFILTER_MODEL,
+        prefilter_top_k: int = CLASSIFY_PREFILTER_TOP_K,
+        backend: str = CLASSIFIER_BACKEND
+    ) -> str:
+        """Cache namespace from configuration alone, without loading any model."""
+        # Results are only reusable for the same model, backend/precision, label set, threshold and cascade setup
+        namespace = (
+            f"{model_name}|{backend}:{backend_class(backend).precision}|"
+            f"{','.join(cls.CATEGORIES)}|{confidence_threshold}"
+        )
+        if prefilter_model:
+            namespace += f"|{prefilter_model}@{prefilter_top_k}"
+        return namespace
+
+    def cache_namespace(self) -> str:
+        return self.namespace_for(
+            self.model_name,
+            self.confidence_threshold,
+            self.prefilter.model_name if self.prefilter else None,
+            self.prefilter.top_k if self.prefilter else None,
+            self.backend_name
+        )
+
+    def classify(self, texts: List[str]) -> List[Dict]:
+        """Batch inference and classifying.
+
+        Every text is paired with each candidate category hypothesis (all of
+        them unless the prefilter cascade is enabled), the pairs are
+        grouped by token length into padded mini-batches bounded by
+        ``max_batch_tokens`` and the entailment scores are scattered back
+        into a ``(len(texts), len(categories))`` matrix.
+        """
+        if not texts:
+            return []
+
+        total_start = time.perf_counter()
+        section_times = {}
+
+        # Section 1: Flatten texts x candidate categories
+        t0 = time.perf_counter()
+        pairs = [
+            (text_idx, category_idx)
+            for text_idx, candidates in enumerate(self.candidate_categories(texts))
+            for category_idx in candidates
+        ]
+        section_times["candidates"] = time.perf_counter() - t0
+
+        # Section 2: Tokenization (padding is deferred to each mini-batch)
+        t1 = time.perf_counter()
+        if self.pretokenized_hypotheses:
+            encoded = self._encode_pairs_pretokenized(texts, pairs)
+        else:
+            encoded = self._encode_pairs(texts, pairs)
+        section_times["tokenize"] = time.perf_counter() - t1
+
+        # Section 3: Length-bucketed inference
+        t2 = time.perf_counter()
+        scores, stats = self._score_pairs(encoded, pairs, len(texts))
+        section_times["inference"] = time.perf_counter() - t2
+
+        # Section 4: Filtering + Fallback + Format
+        t3 = time.perf_counter()
+        results = [self._format_result(text, scores[idx]) for idx, text in enumerate(texts)]
+        section_times["filter_format"] = time.perf_counter() - t3
+
+        total_time = time.perf_counter() - total_start
+        logger.info(
+            f"classify() completed on {len(texts)} texts ({len(pairs)} pairs, {stats['batches']} batches, "
+            f"padding efficiency {stats['padding_efficiency']:.2%}) in {total_time:.2f} seconds "
+            f"({len(texts) / max(total_time, 1e-9):.1f} texts/sec). Times: "
+            + ", ".join([f"{k}={v:.4f}s" for k, v in section_times.items()])
+        )
+
+        return results
+
+    def candidate_categories(self, texts: List[str]) -> List[List[int]]:
+        if self.prefilter is None:
+            return [list(range(len(self.categories)))] * len(texts)
+        return self.prefilter.candidates(texts)
+
+    def _encode_pairs(self, texts: List[str], pairs: List[Tuple[int, int]]) -> List[List[int]]:
+        return self.tokenizer(
+            [texts[text_idx] for text_idx, _ in pairs],
+            [self.hypotheses[category_idx] for _, category_idx in pairs],
+            truncation=True
+        )["input_ids"]
+
+    def _encode_pairs_pretokenized(self, texts: List[str], pairs: List[Tuple[int, int]]) -> List[List[int]]:
+        max_length = self.tokenizer.model_max_length
+        premise_ids = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=max_length
+        )["input_ids"]
+
+        encoded = []
+        for text_idx, category_idx in pairs:
+            hypothesis_ids = self.hypothesis_ids[category_idx]
+            premise_budget = max_length - len(hypothesis_ids) - self.pair_special_tokens
+            encoded.append(self.tokenizer.build_inputs_with_special_tokens(
+                premise_ids[text_idx][:premise_budget], hypothesis_ids
+            ))
+        return encoded
+
+    def _build_batches(self, lengths: List[int]) -> List[List[int]]:
+        # Longest first, so the first pair of every batch fixes its padded length
+        order = sorted(range(len(lengths)), key=lambda idx: lengths[idx], reverse=True)
+
+        batches = []
+        current = []
+        padded_length = 0
+        for idx in order:
+            if not current:
+                current = [idx]
+                padded_length = lengths[idx]
+                continue
+
+            if len(current) < self.max_batch_size and (len(current) + 1) * padded_length <= self.max_batch_tokens:
+                current.append(idx)
+            else:
+                batches.append(current)
+                current = [idx]
+                padded_length = lengths[idx]
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _score_pairs(self, encoded: List[List[int]], pairs: List[Tuple[int, int]], num_texts: int):
+        # Pruned categories keep -1 so they never pass the threshold or win the fallback
+        scores = torch.full((num_texts, len(self.categories)), -1.0)
+        lengths = [len(input_ids) for input_ids in encoded]
+        batches = self._build_batches(lengths)
+
+        real_tokens = sum(lengths)
+        padded_tokens = 0
+
+        for batch in batches:
+            inputs = self.tokenizer.pad(
+                {"input_ids": [encoded[idx] for idx in batch]},
+                return_tensors="pt"
+            ).to(self.device)
+            padded_tokens += inputs["input_ids"].numel()
+
+            logits = self.backend(inputs["input_ids"], inputs["attention_mask"])
+
+            entail_contra_logits = logits[:, [0, 2]]
+            probs = torch.softmax(entail_contra_logits, dim=1)
+
+            text_indices = torch.tensor([pairs[idx][0] for idx in batch])
+            category_indices = torch.tensor([pairs[idx][1] for idx in batch])
+            scores[text_indices, category_indices] = probs[:, 1]
+
+        stats = {
+            "batches": len(batches),
+            "padding_efficiency": real_tokens / max(padded_tokens, 1)
+        }
+        return scores, stats
+
+    def _format_result(self, text: str, entailment_scores: torch.Tensor) -> Dict:
+        label_scores = [
+            {"label": category, "score": score.item()}
+            for category, score in zip(self.categories, entailment_scores)
+            if score.item() >= self.confidence_threshold
+        ]
+
+        if not label_scores:
+            max_score_idx = torch.argmax(entailment_scores).item()
+            label_scores = [{
+                "label": self.categories[max_score_idx],
+                "score": entailment_scores[max_score_idx].item()
+            }]
+        label_scores.sort(key=lambda x: x["score"], reverse=True)
+
+        return {
+            "sequence": text,
+            "labels": [entry["label"] for entry in label_scores],
+            "scores": [entry["score"] for entry in label_scores]
+        }
+
+# Process-pool execution: every worker loads its own classifier in the initializer.
+# The pool defaults to "forkserver" because by the time it is built the parent
+# already runs the Kafka producer and pymongo monitor threads, and forking a
+# multithreaded process holding torch/OpenMP state can deadlock the child.
+_process_classifier = None
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def init_classify_process(num_threads: int):
+    global _process_classifier
+    torch.set_num_threads(num_threads)
+    if _process_classifier is None:
+        _process_classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION)
+
+def classify_in_process(texts: List[str]) -> List[Dict]:
+    return _process_classifier.classify(texts)
+
+def process_ready(_) -> int:
+    return os.getpid()
@@ -1,27 +1,42 @@
 import threading
-from pymongo.errors import DuplicateKeyError
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from datetime import datetime, timezone
 from app.db.mongo import mongo_db
 from app.config.logger_config import logger
-from app.event.kafka_producer import KafkaEventProducer
-from app.config.config import CONTENT_CLASSIFY_TOPIC
+from app.event.kafka_producer import kafka_event_producer
+from app.config.config import CONTENT_CLASSIFY_TOPIC, CONTENT_CLASSIFY_MESSAGE_ITEMS
 
 class ContentService:
     def __init__(self):
         self.content_collection = mongo_db.get_collection("content")
-        self.embedding_update_producer = KafkaEventProducer()
+        self.embedding_update_producer = kafka_event_producer
 
-    def process_content(self, content_data: dict):
-        content_entry = {
+    def _content_entry(self, content_data: dict, created_at: datetime) -> dict:
+        return {
             "title": content_data["title"],
             "description": content_data["description"],
             "url": content_data["url"],
-            "source": content_data["source"],
+            "source": content_data.get("source"),
             "image_link": content_data["image_link"],
             "interactionMetrics": {"likes": 0, "shares": 0, "clicks": 0},
-            "published_at": content_data["published_at"],
-            "created_at": datetime.now(timezone.utc)
+            "published_at": content_data.get("published_at"),
+            "created_at": created_at
         }
+
+    def _classify_item(self, content_id: str, content_data: dict) -> dict:
+        return {
+            "id": content_id,
+            "title": content_data["title"],
+            "desc": content_data["description"],
+            "body": content_data.get("body", ""),
+            "url": content_data["url"],
+            "image_link": content_data["image_link"],
+            "published_at": content_data.get("published_at")
+        }
+
+    def process_content(self, content_data: dict):
+        content_entry = self._content_entry(content_data, datetime.now(timezone.utc))
         
         try:
             inserted = self.content_collection.insert_one(content_entry)
@@ -31,90 +46,107 @@ class ContentService:
             content_id = str(existing_entry["_id"])
 
         logger.info(f"Content processed and stored successfully: {content_id}")
-        self.embedding_update_producer.send(CONTENT_CLASSIFY_TOPIC,
-         {
-            "id": content_id,
-            "title": content_data["title"],
-            "desc": content_data["description"],
-            "body": content_data.get("body", "")
-        })
+        self.embedding_update_producer.send(CONTENT_CLASSIFY_TOPIC, self._classify_item(content_id, content_data))
         return {"message": "Content added successfully!", "content_id": content_id}
 
+    def process_batch_content(self, content_list: list):
+        if not content_list:
+            return {"message": "No content to process.", "new_entries": 0, "updated_entries": 0, "queued_for_classification": 0}
+
+        logger.info(f"Processing {len(content_list)} articles in batch")
+
+        # Last occurrence wins when the same url is posted twice in one batch
+        content_by_url = {content_data["url"]: content_data for content_data in content_list}
+        existing_articles = {
+            doc["url"]: doc
+            for doc in self.content_collection.find(
+                {"url": {"$in": list(content_by_url)}},
+                {"_id": 1, "url": 1, "title": 1, "description": 1, "category": 1}
+            )
+        }
+
+        now = datetime.now(timezone.utc)
+        new_entries = []
+        updates = []
+        classify_items = []
+
+        for url, content_data in content_by_url.items():
+            existing_entry = existing_articles.get(url)
+            if existing_entry is None:
+                new_entries.append(self._content_entry(content_data, now))
+                continue
+
+            changed = (
+                existing_entry.get("title") != content_data["title"]
+                or existing_entry.get("description") != content_data["description"]
+            )
+            if changed:
+                updates.append(UpdateOne(
+                    {"_id": existing_entry["_id"]},
+                    {"$set": {
+                        "title": content_data["title"],
+                        "description": content_data["description"],
+                        "image_link": content_data["image_link"],
+                        "updated_at": now
+                    }}
+                ))
+
+            # Unchanged articles that are already classified need no new inference
+            if changed or not existing_entry.get("category"):
+                classify_items.append(self._classify_item(str(existing_entry["_id"]), content_data))
+
+        inserted_count = 0
+        if new_entries:
+            failed_urls = []
+            try:
+                self.content_collection.insert_many(new_entries, ordered=False)
+            except BulkWriteError as e:
+                # Another writer inserted some of these urls since the $in lookup
+                failed_indexes = {error["index"] for error in e.details.get("writeErrors", []) if error.get("code") == 11000}
+                if len(failed_indexes) != len(e.details.get("writeErrors", [])):
+                    raise
+                failed_urls = [new_entries[idx]["url"] for idx in failed_indexes]
+                new_entries = [entry for idx, entry in enumerate(new_entries) if idx not in failed_indexes]
+
+            inserted_count = len(new_entries)
+            for entry in new_entries:
+                classify_items.append(self._classify_item(str(entry["_id"]), content_by_url[entry["url"]]))
+
+            if failed_urls:
+                for doc in self.content_collection.find({"url": {"$in": failed_urls}}, {"_id": 1, "url": 1, "category": 1}):
+                    if not doc.get("category"):
+                        classify_items.append(self._classify_item(str(doc["_id"]), content_by_url[doc["url"]]))
+
+        if updates:
+            self.content_collection.bulk_write(updates, ordered=False)
+
+        for start in range(0, len(classify_items), CONTENT_CLASSIFY_MESSAGE_ITEMS):
+            self.embedding_update_producer.send(
+                CONTENT_CLASSIFY_TOPIC,
+                {"items": classify_items[start:start + CONTENT_CLASSIFY_MESSAGE_ITEMS]}
+            )
+
+        logger.info(
+            f"Batch content processing complete. {inserted_count} new, {len(updates)} updated, "
+            f"{len(classify_items)} queued for classification."
+        )
+        return {
+            "message": "Batch content processing completed.",
+            "new_entries": inserted_count,
+            "updated_entries": len(updates),
+            "queued_for_classification": len(classify_items)
+        }
+
     def bulkUpdate(self, updatedArticle):
        return self.content_collection.bulk_write(updatedArticle)
     
     def aggregation(self, pipeline):
         return list(self.content_collection.aggregate(pipeline))
+
+    def find(self, query, projection=None):
+        return list(self.content_collection.find(query, projection))
     
     def classify_content(self, content_data):
         return self.classifier.classify(content_data["title"], content_data["description"], content_data.get("body", ""))
     
 content_service = ContentService()
-
-
-
-
-
-
-
-
-
-
-# def process_batch_content(self, content_list: list):
-#         if not content_list:
-#             return {"message": "No content to process."}
-
-#         logger.info(f"Processing {len(content_list)} articles in batch")
-
-#         urls = [content["url"] for content in content_list]
-#         existing_articles = {doc["url"]: doc for doc in self.content_collection.find({"url": {"$in": urls}})}
-
-#         updates = []
-#         new_entries = []
-#         tasks = []
-
-#         with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-#             for content_data in content_list:
-#                 url = content_data["url"]
-#                 existing_entry = existing_articles.get(url)
-
-#                 if existing_entry:
-#                     if (
-#                         existing_entry["title"] == content_data["title"]
-#                         and existing_entry["description"] == content_data["description"]
-#                     ):
-#                         continue
-
-#                 tasks.append(executor.submit(self.classify_content, content_data))
-
-#             classified_results = [task.result() for task in concurrent.futures.as_completed(tasks)]
-
-#         for content_data, (category, tags) in zip(content_list, classified_results):
-#             url = content_data["url"]
-#             content_data["category"] = content_data.get("category", category)
-#             content_data["tags"] = tags
-
-#             content_entry = {
-#                 "title": content_data["title"],
-#                 "description": content_data["description"],
-#                 "category": content_data["category"],
-#                 "tags": content_data["tags"],
-#                 "url": content_data["url"],
-#                 "image_link": content_data["image_link"],
-#                 "interactionMetrics": {"likes": 0, "shares": 0, "clicks": 0},
-#                 "created_at": datetime.now(timezone.utc),
-#             }
-
-#             if url in existing_articles:
-#                 updates.append(UpdateOne({"url": url}, {"$set": content_entry}))
-#             else:
-#                 new_entries.append(content_entry)
-
-#         with self.lock:
-#             if updates:
-#                 self.content_collection.bulk_write(updates)
-#             if new_entries:
-#                 self.content_collection.insert_many(new_entries)
-
-#         logger.info(f"Batch content processing complete. {len(new_entries)} new, {len(updates)} updated.")
-#         return {"message": "Batch content processing completed.", "new_entries": len(new_entries), "updated_entries": len(updates)}
\ No newline at end of file
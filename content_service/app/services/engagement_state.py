@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+from pymongo import ReplaceOne
+import redis
+from app.config.logger_config import logger
+from app.db.mongo import mongo_db
+from app.config.config import (
+    ENGAGEMENT_STATE_BACKEND, ENGAGEMENT_STATE_MAX_ENTRIES, ENGAGEMENT_STATE_TTL_SECONDS,
+    REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_SSL
+)
+
+def score_change(last_score: float, new_score: float) -> float:
+    return (new_score - last_score) / max(1, last_score) if last_score > 0 else new_score
+
+
+class LocalEngagementStateStore:
+    """Last score that triggered an embedding update, per article.
+
+    Bounded LRU with a TTL, so memory stays flat. State is process-local:
+    ``save_snapshot``/``load_snapshot`` carry it across restarts through the
+    ``engagement_state`` collection.
+    """
+
+    def __init__(self, max_entries: int = ENGAGEMENT_STATE_MAX_ENTRIES, ttl_seconds: float = ENGAGEMENT_STATE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.snapshot_collection = mongo_db.get_collection("engagement_state")
+
+    def should_trigger(self, scores: Dict[str, float], deltas: Dict[str, float], threshold: float) -> List[str]:
+        # Single replica: the caller's own score is the source of truth, so deltas are not needed
+        now = time.time()
+        triggered = []
+        with self.lock:
+            for article_id, new_score in scores.items():
+                last_score, updated_at = self.entries.get(article_id, (0, 0))
+                if now - updated_at > self.ttl_seconds:
+                    last_score = 0
+                if score_change(last_score, new_score) > threshold:
+                    self.entries[article_id] = (new_score, now)
+                    self.entries.move_to_end(article_id)
+                    triggered.append(article_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return triggered
+
+    def save_snapshot(self):
+        if self.snapshot_collection is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            entries = [(article_id, score, updated_at) for article_id, (score, updated_at) in self.entries.items() if updated_at >= cutoff]
+
+        try:
+            if entries:
+                self.snapshot_collection.bulk_write([
+                    ReplaceOne({"_id": article_id}, {"score": score, "updated_at": updated_at}, upsert=True)
+                    for article_id, score, updated_at in entries
+                ], ordered=False)
+            self.snapshot_collection.delete_many({"updated_at": {"$lt": cutoff}})
+            logger.info(f"Saved engagement state snapshot ({len(entries)} articles)")
+        except Exception as e:
+            logger.error(f"Error saving engagement state snapshot: {e}")
+
+    def load_snapshot(self):
+        if self.snapshot_collection is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            # Newest entries win when the snapshot outgrew the LRU; insert oldest first to keep LRU order
+            docs = list(
+                self.snapshot_collection.find({"updated_at": {"$gte": cutoff}})
+                .sort("updated_at", -1)
+                .limit(self.max_entries)
+            )
+        except Exception as e:
+            logger.error(f"Error loading engagement state snapshot: {e}")
+            return
+
+        with self.lock:
+            for doc in reversed(docs):
+                self.entries[doc["_id"]] = (doc["score"], doc["updated_at"])
+        logger.info(f"Restored engagement state for {len(docs)} articles")
+
+
+class RedisEngagementStateStore:
+    """Engagement trigger state shared by all replicas, one Redis hash per article.
+
+    ``current`` is the shared engagement score: every replica adds its own
+    deltas with ``HINCRBYFLOAT``, so all replicas compare the same value
+    instead of their diverging in-process scores. ``score`` is the value that
+    last fired. The add/compare/write runs as one Lua script, so two replicas
+    seeing the same jump cannot both fire an update. A missing hash is seeded
+    from the caller's absolute score. Keys expire after the TTL, and the state
+    survives restarts in Redis itself, so snapshots are no-ops.
+    """
+
+    KEY_PREFIX = "engagement_state:"
+    COMPARE_AND_UPDATE = """
+    local new
+    if redis.call('HEXISTS', KEYS[1], 'current') == 1 then
+        new = tonumber(redis.call('HINCRBYFLOAT', KEYS[1], 'current', ARGV[1]))
+    else
+        new = tonumber(ARGV[2])
+        redis.call('HSET', KEYS[1], 'current', ARGV[2])
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    local last = tonumber(redis.call('HGET', KEYS[1], 'score') or '0')
+    local change = new
+    if last > 0 then
+        change = (new - last) / math.max(1, last)
+    end
+    if change > tonumber(ARGV[3]) then
+        redis.call('HSET', KEYS[1], 'score', tostring(new), 'updated_at', ARGV[4])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, ttl_seconds: float = ENGAGEMENT_STATE_TTL_SECONDS):
+        self.ttl_seconds = int(ttl_seconds)
+        self.client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, ssl=REDIS_SSL)
+        self.client.ping()
+        self.compare_and_update = self.client.register_script(self.COMPARE_AND_UPDATE)
+        logger.info("Engagement state store using Redis.")
+
+    def should_trigger(self, scores: Dict[str, float], deltas: Dict[str, float], threshold: float) -> List[str]:
+        if not scores:
+            return []
+        now = time.time()
+        article_ids = list(scores)
+        pipeline = self.client.pipeline(transaction=False)
+        for article_id in article_ids:
+            self.compare_and_update(
+                keys=[f"{self.KEY_PREFIX}{article_id}"],
+                args=[deltas.get(article_id, 0), scores[article_id], threshold, now, self.ttl_seconds],
+                client=pipeline
+            )
+        results = pipeline.execute()
+        return [article_id for article_id, fired in zip(article_ids, results) if fired]
+
+    def save_snapshot(self):
+        pass
+
+    def load_snapshot(self):
+        pass
+
+
+def create_engagement_state_store(backend: str = ENGAGEMENT_STATE_BACKEND):
+    if backend == "redis":
+        try:
+            return RedisEngagementStateStore()
+        except redis.RedisError as e:
+            logger.error(f"Redis engagement state store unavailable, falling back to local: {e}")
+    return LocalEngagementStateStore()
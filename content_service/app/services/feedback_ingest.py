@@ -0,0 +1,72 @@
+import queue
+from app.config.logger_config import logger
+from app.config.config import (
+    FEEDBACK_INGEST_MODE, KAFKA_FEEDBACK_TOPIC, KAFKA_FEEDBACK_GROUP,
+    FEEDBACK_BATCH_SIZE, FEEDBACK_BATCH_WAIT_SECONDS, FEEDBACK_QUEUE_SIZE, FEEDBACK_PRODUCER_MAX_BLOCK_MS
+)
+from app.event.kafka_consumer import KafkaEventConsumer
+from app.event.kafka_producer import KafkaEventProducer
+from app.services.feedback_service import feedback_log_service
+from app.services.micro_batcher import MicroBatcher
+
+class FeedbackIngestor:
+    """Accept-and-enqueue front for feedback events.
+
+    ``sync`` processes each request inline (the original behaviour).
+    ``kafka`` appends events to ``KAFKA_FEEDBACK_TOPIC`` and a batch consumer
+    in this service processes them. ``local`` uses a bounded in-process queue
+    instead, for single-node setups; it is not durable, so events still queued
+    when the process dies are lost.
+    """
+
+    def __init__(self, mode: str = FEEDBACK_INGEST_MODE):
+        self.mode = mode
+        self.feedback_service = feedback_log_service
+        self.producer = None
+        self.consumer = None
+        self.batcher = None
+
+        if mode == "kafka":
+            # Own producer with a short max_block_ms: a full buffer or an unreachable broker turns into a 503, not a stalled request
+            self.producer = KafkaEventProducer(blocking=False, max_block_ms=FEEDBACK_PRODUCER_MAX_BLOCK_MS)
+            self.consumer = KafkaEventConsumer(topic=KAFKA_FEEDBACK_TOPIC, group_id=KAFKA_FEEDBACK_GROUP)
+        elif mode == "local":
+            self.batcher = MicroBatcher(
+                handler=self.feedback_service.process_metadata_batch,
+                max_batch_size=FEEDBACK_BATCH_SIZE,
+                max_wait_seconds=FEEDBACK_BATCH_WAIT_SECONDS,
+                max_queue_size=FEEDBACK_QUEUE_SIZE,
+                num_consumers=1,
+                name="feedback-batcher"
+            )
+
+    @property
+    def is_async(self) -> bool:
+        return self.mode in ("kafka", "local")
+
+    def start(self):
+        if self.consumer:
+            self.consumer.listen_batch(self.feedback_service.process_metadata_batch)
+        elif self.batcher:
+            self.batcher.start()
+        logger.info(f"Feedback ingestion mode: {self.mode}")
+
+    def enqueue(self, event: dict) -> bool:
+        if self.mode == "kafka":
+            return self.producer.try_send(KAFKA_FEEDBACK_TOPIC, event)
+
+        try:
+            self.batcher.submit(event, timeout=0)
+            return True
+        except (queue.Full, RuntimeError):
+            logger.warning("Feedback queue is full, rejecting event")
+            return False
+
+    def stop(self):
+        if self.consumer:
+            self.consumer.stop()
+            self.producer.close()
+        elif self.batcher:
+            self.batcher.stop()
+
+feedback_ingestor = FeedbackIngestor()
@@ -1,10 +1,10 @@
 from datetime import datetime, timezone
-from pymongo import UpdateOne
+from collections import defaultdict
 from bson import ObjectId
-from threading import Lock
 from app.config.logger_config import logger
 from app.config.config import KAFKA_INTERACTION_UPDATE
 from app.services.content_serve import content_service
+from app.services.interaction_counter import interaction_counters
 from app.event.kafka_service import content_kafka_service
 from app.event.kafka_producer import kafka_event_producer
 
@@ -13,69 +13,83 @@ class FeedbackProcessor:
         self.content_service = content_service
         self.kafka_service = content_kafka_service
         self.feedback_producer = kafka_event_producer
-        self.lock = Lock()
+        self.interaction_counters = interaction_counters
 
     def process_metadata_update(self, event):
         try:
             articles = event.get("articles", [])
             email = event.get("email")
-            print(event)
             if not email or not articles:
                 logger.warning("Invalid interaction update event: missing email or articles")
                 return
-            
-            logger.info(f"Received metadata update for {len(articles)} articles.")
 
-            with self.lock:
-                bulk_updates = []
-                article_ids = []
-                kafka_interaction_payload = []
-                
-                for article in articles:
-                    article_id = article["id"]
-                    interaction = article["interaction"]
-                    
-                    
-                    try:
-                        article_id = ObjectId(article_id)
-                    except Exception:
-                        pass
-                    
-                    article_ids.append(article_id)
-                    update_query = {
-                        "$inc": {
-                            "interactionMetrics.likes": interaction.get("likes", 0),
-                            "interactionMetrics.shares": interaction.get("shares", 0),
-                            "interactionMetrics.clicks": interaction.get("clicks", 0)
-                        },
-                        "$set": {"updated_at": datetime.now(timezone.utc)}
-                    }
-                    
-                    bulk_updates.append(UpdateOne({"_id": article_id}, update_query))
-                    
-                    kafka_entry = {
-                        "articleId" : str(article_id),
-                        "like": interaction.get("likes", 0) > 0,
-                        "share": interaction.get("shares",0),
-                        "viewedAt": datetime.now(timezone.utc).isoformat()
-                    }
-                    
-                    kafka_interaction_payload.append(kafka_entry)
-                    
-                if bulk_updates:
-                    result = self.content_service.bulkUpdate(bulk_updates)
-                    logger.info(f"Matched: {result.matched_count}, Modified: {result.modified_count}")
-                    
-                logger.info("Sending interaction update to user-service via Kafka.")
-                self.feedback_producer.send(KAFKA_INTERACTION_UPDATE, {
-                    "email": email,
-                    "interactions": kafka_interaction_payload
-                })
-                
-                logger.info("Calling post-processing compute pipeline.")
-                self.kafka_service.batch_compute_and_trigger_updates(article_ids, email)
+            logger.info(f"Received metadata update for {len(articles)} articles.")
+            self._apply_feedback(email, articles)
 
         except Exception as e:
             logger.error(f"Error processing metadata update: {e}", exc_info=True)
-            
+
+    def process_metadata_batch(self, events):
+        """Applies queued feedback events, merged into one update per user.
+
+        Errors are logged per user rather than raised. The counter deltas are
+        already buffered when a later step fails, so redelivering the batch
+        would count them twice.
+        """
+        merged = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        for event in events:
+            email = event.get("email")
+            if not email or not event.get("articles"):
+                logger.warning("Invalid interaction update event: missing email or articles")
+                continue
+            for article in event["articles"]:
+                interaction = merged[email][article["id"]]
+                for metric, value in article["interaction"].items():
+                    interaction[metric] += value
+
+        logger.info(f"Processing {len(events)} feedback events for {len(merged)} users.")
+        for email, articles in merged.items():
+            try:
+                self._apply_feedback(email, [
+                    {"id": article_id, "interaction": interaction}
+                    for article_id, interaction in articles.items()
+                ])
+            except Exception as e:
+                logger.error(f"Error processing metadata update for {email}: {e}", exc_info=True)
+
+    def _apply_feedback(self, email, articles):
+        article_interactions = []
+        kafka_interaction_payload = []
+
+        for article in articles:
+            article_id = article["id"]
+            interaction = article["interaction"]
+
+            try:
+                article_id = ObjectId(article_id)
+            except Exception:
+                pass
+
+            article_interactions.append((article_id, interaction))
+            # Counter writes are coalesced and flushed in the background
+            self.interaction_counters.add(article_id, interaction)
+
+            kafka_entry = {
+                "articleId" : str(article_id),
+                "like": interaction.get("likes", 0) > 0,
+                "share": interaction.get("shares",0),
+                "viewedAt": datetime.now(timezone.utc).isoformat()
+            }
+
+            kafka_interaction_payload.append(kafka_entry)
+
+        logger.info("Sending interaction update to user-service via Kafka.")
+        self.feedback_producer.send(KAFKA_INTERACTION_UPDATE, {
+            "email": email,
+            "interactions": kafka_interaction_payload
+        })
+
+        logger.info("Calling post-processing compute pipeline.")
+        self.kafka_service.batch_compute_and_trigger_updates(article_interactions, email)
+
 feedback_log_service = FeedbackProcessor()
\ No newline at end of file
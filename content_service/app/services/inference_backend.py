@@ -0,0 +1,148 @@
+import os
+import torch
+from transformers import AutoModelForSequenceClassification
+from app.config.logger_config import logger
+
+# Selected with CLASSIFIER_BACKEND:
+#   torch        dynamically quantized PyTorch model (default, no export needed)
+#   torchscript  traced quantized model, see `python -m app.tools.classifier_bench export --backend torchscript`
+#   onnx         int8 ONNX Runtime graph, see `python -m app.tools.classifier_bench export --backend onnx`
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+
+def load_quantized_model(model_name: str, torchscript: bool = False):
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, torchscript=torchscript)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model = model.to("cpu")
+    model.eval()
+    return model
+
+
+def export_paths(model_name: str, export_dir: str) -> dict:
+    slug = model_name.replace("/", "__")
+    return {
+        "torchscript": os.path.join(export_dir, f"{slug}.torchscript.pt"),
+        "onnx_fp32": os.path.join(export_dir, f"{slug}.onnx"),
+        "onnx": os.path.join(export_dir, f"{slug}.int8.onnx"),
+    }
+
+
+class TorchBackend:
+    name = "torch"
+    precision = "qint8-dynamic"
+
+    def __init__(self, model_name: str):
+        self.model = load_quantized_model(model_name)
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class TorchScriptBackend:
+    name = "torchscript"
+    precision = "qint8-dynamic"
+
+    def __init__(self, model_path: str):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"TorchScript model not found at {model_path}, run the export command first")
+        self.model = torch.jit.load(model_path, map_location="cpu")
+        self.model.eval()
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            return self.model(input_ids, attention_mask)
+
+
+class OnnxBackend:
+    name = "onnx"
+    precision = "int8"
+
+    def __init__(self, model_path: str):
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found at {model_path}, run the export command first")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        logits = self.session.run(
+            ["logits"],
+            {"input_ids": input_ids.numpy(), "attention_mask": attention_mask.numpy()}
+        )[0]
+        return torch.from_numpy(logits)
+
+
+BACKENDS = {"torch": TorchBackend, "torchscript": TorchScriptBackend, "onnx": OnnxBackend}
+
+def backend_class(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown classifier backend: {backend}")
+    return BACKENDS[backend]
+
+
+def create_backend(backend: str, model_name: str, export_dir: str):
+    paths = export_paths(model_name, export_dir)
+    backend_cls = backend_class(backend)
+    if backend_cls is TorchBackend:
+        instance = TorchBackend(model_name)
+    else:
+        instance = backend_cls(paths[backend])
+
+    logger.info(f"Classifier inference backend: {instance.name}")
+    return instance
+
+
+def export_torchscript(model_name: str, tokenizer, export_dir: str) -> str:
+    path = export_paths(model_name, export_dir)["torchscript"]
+    os.makedirs(export_dir, exist_ok=True)
+
+    sample = tokenizer(["Sample premise for tracing."], ["This text is about Science."], return_tensors="pt")
+    wrapper = _LogitsOnly(load_quantized_model(model_name, torchscript=True))
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, (sample["input_ids"], sample["attention_mask"]))
+    traced.save(path)
+
+    logger.info(f"TorchScript model exported to {path}")
+    return path
+
+
+def export_onnx(model_name: str, tokenizer, export_dir: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    paths = export_paths(model_name, export_dir)
+    os.makedirs(export_dir, exist_ok=True)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, torchscript=True)
+    model.eval()
+    sample = tokenizer(["Sample premise for export."], ["This text is about Science."], return_tensors="pt")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            paths["onnx_fp32"],
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+        )
+
+    quantize_dynamic(paths["onnx_fp32"], paths["onnx"], weight_type=QuantType.QInt8)
+    logger.info(f"ONNX model exported to {paths['onnx_fp32']} and quantized to {paths['onnx']}")
+    return paths["onnx"]
@@ -0,0 +1,125 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config.logger_config import logger
+from app.config.config import FEEDBACK_FLUSH_INTERVAL_SECONDS, FEEDBACK_FLUSH_MAX_ARTICLES
+from app.services.content_serve import content_service
+
+ENGAGEMENT_WEIGHTS = {"likes": 0.4, "shares": 0.3, "clicks": 0.3}
+METRICS = tuple(ENGAGEMENT_WEIGHTS)
+
+def engagement_score(metrics: dict) -> float:
+    return sum((metrics.get(metric) or 0) * weight for metric, weight in ENGAGEMENT_WEIGHTS.items())
+
+class InteractionCounterBuffer:
+    """Write-behind buffer for article interaction counters.
+
+    Like/share/click deltas are summed per article in memory and written as
+    one coalesced ``$inc`` bulk write every
+    ``flush_interval`` seconds, or sooner once ``max_pending`` distinct
+    articles are waiting. ``$inc`` is commutative, so every replica can flush
+    its own buffer independently.
+
+    Loss window: deltas accepted since the last successful flush (at most
+    ``flush_interval`` seconds of feedback) are lost if the process dies
+    without a clean shutdown. ``stop()`` flushes everything that is pending,
+    and a failed flush keeps the deltas that were not applied for the next
+    attempt.
+    """
+
+    def __init__(self, flush_interval: float = FEEDBACK_FLUSH_INTERVAL_SECONDS, max_pending: int = FEEDBACK_FLUSH_MAX_ARTICLES):
+        self.content_service = content_service
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def add(self, article_id, interaction: dict):
+        with self.lock:
+            counters = self.pending[article_id]
+            for metric in METRICS:
+                counters[metric] += interaction.get(metric, 0)
+            pending_articles = len(self.pending)
+
+        if pending_articles >= self.max_pending:
+            self.wake_event.set()
+
+    def pending_scores(self, article_ids) -> dict:
+        """Engagement score of the deltas accepted but not yet flushed, per article."""
+        with self.lock:
+            return {article_id: engagement_score(self.pending[article_id]) for article_id in article_ids if article_id in self.pending}
+
+    def start(self):
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+        logger.info(f"Interaction counter write-behind started (interval={self.flush_interval}s, max_pending={self.max_pending})")
+
+    def _flush_loop(self):
+        while not self.stop_event.is_set():
+            self.wake_event.wait(self.flush_interval)
+            self.wake_event.clear()
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                batch = self.pending
+                self.pending = defaultdict(lambda: defaultdict(int))
+
+            now = datetime.now(timezone.utc)
+            article_ids = list(batch)
+            operations = [
+                UpdateOne(
+                    {"_id": article_id},
+                    {
+                        "$inc": {f"interactionMetrics.{metric}": batch[article_id][metric] for metric in METRICS},
+                        "$set": {"updated_at": now}
+                    }
+                )
+                for article_id in article_ids
+            ]
+
+            try:
+                result = self.content_service.bulkUpdate(operations)
+                logger.info(f"Flushed interaction counters for {len(operations)} articles. Matched: {result.matched_count}, Modified: {result.modified_count}")
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                if not write_errors:
+                    # Only the write concern failed; every $inc was applied, re-adding them would double count
+                    logger.error(f"Interaction counter flush applied without write concern acknowledgement: {e.details.get('writeConcernErrors')}")
+                    return
+                # The bulk write is ordered: ops before the failing index were applied, the rest never ran.
+                # The failing op itself is deterministic for an $inc on _id, so it is dropped rather than retried forever.
+                failed = write_errors[0]
+                unapplied = article_ids[failed["index"] + 1:]
+                logger.error(
+                    f"Interaction counter flush stopped at article {article_ids[failed['index']]} ({failed.get('errmsg')}); "
+                    f"{failed['index']} applied, 1 dropped, keeping {len(unapplied)} for retry"
+                )
+                self._requeue(batch, unapplied)
+            except Exception as e:
+                logger.error(f"Interaction counter flush failed, keeping {len(batch)} articles for retry: {e}")
+                self._requeue(batch, article_ids)
+
+    def _requeue(self, batch, article_ids):
+        with self.lock:
+            for article_id in article_ids:
+                for metric, value in batch[article_id].items():
+                    self.pending[article_id][metric] += value
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.flush_thread:
+            self.flush_thread.join()
+        self.flush()
+
+interaction_counters = InteractionCounterBuffer()
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from app.config.logger_config import logger
+from app.event.kafka_producer import kafka_event_producer
+from app.config.config import KAFKA_BALANCE_INTEREST_TOPIC, INTEREST_WINDOW_SECONDS, INTEREST_MAX_PENDING_USERS
+
+class InterestAggregator:
+    """Coalesces per-user interest weights before publishing balance_user_interest.
+
+    Topic weights and counts are summed from a user's first feedback in a
+    window until ``window_seconds`` later, then published as one averaged
+    event. When more than ``max_pending_users`` users are pending, the oldest
+    windows are closed early. ``stop()`` publishes everything still pending.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = INTEREST_WINDOW_SECONDS,
+        max_pending_users: int = INTEREST_MAX_PENDING_USERS,
+        topic: str = KAFKA_BALANCE_INTEREST_TOPIC
+    ):
+        self.producer = kafka_event_producer
+        self.window_seconds = window_seconds
+        self.max_pending_users = max_pending_users
+        self.topic = topic
+        # Insertion order is window-open order, so due windows are always at the front
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def add(self, email: str, weights: dict, counts: dict):
+        overflow = []
+        with self.lock:
+            window = self.pending.get(email)
+            if window is None:
+                window = {"opened_at": time.monotonic(), "weights": defaultdict(float), "counts": defaultdict(int)}
+                self.pending[email] = window
+            for topic, weight in weights.items():
+                window["weights"][topic] += weight
+                window["counts"][topic] += counts[topic]
+
+            while len(self.pending) > self.max_pending_users:
+                overflow.append(self.pending.popitem(last=False))
+
+        for pending_email, pending_window in overflow:
+            self._emit(pending_email, pending_window)
+
+    def start(self):
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+        logger.info(f"Interest aggregator started (window={self.window_seconds}s, max_pending_users={self.max_pending_users})")
+
+    def _flush_loop(self):
+        tick = min(1.0, self.window_seconds)
+        while not self.stop_event.wait(tick):
+            self.flush(due_only=True)
+
+    def flush(self, due_only: bool = False):
+        cutoff = time.monotonic() - self.window_seconds
+        due = []
+        with self.lock:
+            while self.pending:
+                email, window = next(iter(self.pending.items()))
+                if due_only and window["opened_at"] > cutoff:
+                    break
+                self.pending.popitem(last=False)
+                due.append((email, window))
+
+        for email, window in due:
+            self._emit(email, window)
+
+    def _emit(self, email, window):
+        user_interest = [
+            {"topic": topic, "weight": weight / window["counts"][topic]}
+            for topic, weight in window["weights"].items()
+            if window["counts"][topic] > 0
+        ]
+        try:
+            self.producer.send(self.topic, {"email": email, "updatedInterest": user_interest})
+        except Exception as e:
+            logger.error(f"Error publishing interest update for {email}: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.flush_thread:
+            self.flush_thread.join()
+        self.flush()
+        logger.info("Interest aggregator flushed and stopped.")
+
+interest_aggregator = InterestAggregator()
@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+from app.config.logger_config import logger
+
+_STOP = object()
+
+class MicroBatcher:
+    """Bounded queue drained by a fixed set of consumer threads.
+
+    A consumer starts a batch with the first item it receives and closes it
+    once ``max_batch_size`` items are collected or ``max_wait_seconds`` have
+    passed, then hands the whole batch to ``handler``. ``submit`` returns a
+    Future resolved when the item's batch has been handled.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Any],
+        max_batch_size: int,
+        max_wait_seconds: float,
+        max_queue_size: int,
+        num_consumers: int,
+        name: str = "micro-batcher"
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.max_queue_size = max_queue_size
+        self.num_consumers = num_consumers
+        self.name = name
+
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.closed = threading.Event()
+        self.consumers = []
+
+    def start(self):
+        for idx in range(self.num_consumers):
+            thread = threading.Thread(target=self._consume, name=f"{self.name}-{idx}", daemon=True)
+            thread.start()
+            self.consumers.append(thread)
+        logger.info(
+            f"{self.name} started: {self.num_consumers} consumers, batch={self.max_batch_size}, "
+            f"wait={self.max_wait_seconds}s, queue={self.max_queue_size}"
+        )
+
+    def submit(self, item, timeout: float = None) -> Future:
+        if self.closed.is_set():
+            raise RuntimeError(f"{self.name} is shutting down, item rejected")
+        future = Future()
+        self.queue.put((item, future), timeout=timeout)
+        return future
+
+    def stop(self, timeout: float = None):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        logger.info(f"{self.name} draining {self.queue.qsize()} queued items")
+
+        # Sentinels queue up behind the remaining items, so everything already accepted is handled
+        for _ in self.consumers:
+            self.queue.put(_STOP)
+        for thread in self.consumers:
+            thread.join(timeout)
+        logger.info(f"{self.name} stopped")
+
+    def _consume(self):
+        while True:
+            entry = self.queue.get()
+            if entry is _STOP:
+                return
+
+            batch = [entry]
+            stop_after_batch = False
+            deadline = time.monotonic() + self.max_wait_seconds
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop_after_batch = True
+                    break
+                batch.append(entry)
+
+            self._run(batch)
+            if stop_after_batch:
+                return
+
+    def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            result = self.handler(items)
+        except Exception as e:
+            logger.error(f"{self.name} handler failed for {len(items)} items: {e}", exc_info=True)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for _, future in batch:
+            future.set_result(result)
@@ -1,70 +1,199 @@
 from apscheduler.schedulers.blocking import BlockingScheduler
-import requests
+import asyncio
+import httpx
+from datetime import datetime, timezone
 from app.config.logger_config import logger
-from app.config.config import API_KEY,FETCH_API_URL,PROCESS_API_URL
+from app.db.mongo import mongo_db
+from app.config.config import (
+    API_KEY, FETCH_API_URL, PROCESS_BATCH_API_URL, INGEST_BATCH_SIZE,
+    FETCH_PAGE_SIZE, FETCH_MAX_ARTICLES, FETCH_CONCURRENCY, FETCH_TIMEOUT_SECONDS
+)
+
+WATERMARK_ID = "news_fetch"
+
+def parse_published_at(value):
+    if not value:
+        return None
+    try:
+        published_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return published_at if published_at.tzinfo else published_at.replace(tzinfo=timezone.utc)
 
 class NewsScheduler:
-    def __init__(self, api_key, fetch_url, process_url, interval_hours=3):
+    def __init__(
+        self,
+        api_key,
+        fetch_url,
+        process_batch_url,
+        interval_hours=3,
+        upload_batch_size=INGEST_BATCH_SIZE,
+        page_size=FETCH_PAGE_SIZE,
+        max_articles=FETCH_MAX_ARTICLES,
+        concurrency=FETCH_CONCURRENCY
+    ):
         self.API_KEY = api_key
         self.FETCH_API_URL = fetch_url
-        self.PROCESS_API_URL = process_url
+        self.PROCESS_BATCH_API_URL = process_batch_url
         self.interval_hours = interval_hours
+        self.upload_batch_size = upload_batch_size
+        self.page_size = page_size
+        self.max_articles = max_articles
+        self.concurrency = concurrency
+
+        self.content_collection = mongo_db.get_collection("content")
+        self.state_collection = mongo_db.get_collection("scheduler_state")
 
         # Configure scheduler
         self.scheduler = BlockingScheduler()
 
-    def fetch_news(self):
+    def load_watermark(self):
+        state = self.state_collection.find_one({"_id": WATERMARK_ID}) if self.state_collection is not None else None
+        return parse_published_at(state.get("last_published_at")) if state else None
+
+    def save_watermark(self, watermark: datetime):
+        if self.state_collection is None:
+            return
+        self.state_collection.update_one(
+            {"_id": WATERMARK_ID},
+            {"$set": {"last_published_at": watermark.isoformat(), "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        logger.info(f"News fetch watermark advanced to {watermark.isoformat()}")
+
+    async def fetch_page(self, client: httpx.AsyncClient, offset: int, watermark):
+        params = {
+            "access_key": self.API_KEY,
+            "limit": self.page_size,
+            "offset": offset,
+            "language": "en",
+            "sort": "published_desc"
+        }
+        if watermark:
+            params["date"] = f"{watermark.date().isoformat()},{datetime.now(timezone.utc).date().isoformat()}"
+
+        response = await client.get(self.FETCH_API_URL, params=params)
+        response.raise_for_status()
+        payload = response.json()
+        return payload.get("data", []), payload.get("pagination", {}).get("total", 0)
+
+    async def fetch_news(self, client: httpx.AsyncClient, watermark):
+        """Returns (articles, status).
+
+        ``status`` is ``"complete"``, ``"capped"`` when pages past
+        ``max_articles`` were never requested, or ``"failed"`` when a page
+        request failed.
+        """
         try:
-            categories = "health,science,technology,sports,entertainment,business"
-            params = {
-                "access_key": self.API_KEY,
-                "limit": 100,
-                "language": "en"
+            news_data, total = await self.fetch_page(client, 0, watermark)
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching news: {e}")
+            return [], "failed"
+
+        # Remaining pages are requested concurrently, bounded by the connection pool
+        target = min(total, self.max_articles)
+        offsets = list(range(self.page_size, target, self.page_size))
+        pages = await asyncio.gather(
+            *(self.fetch_page(client, offset, watermark) for offset in offsets),
+            return_exceptions=True
+        )
+        status = "complete" if total <= self.max_articles else "capped"
+        if status == "capped":
+            logger.warning(f"{total} articles available, only the newest {self.max_articles} fetched (FETCH_MAX_ARTICLES)")
+        for offset, page in zip(offsets, pages):
+            if isinstance(page, Exception):
+                logger.warning(f"Error fetching news page at offset {offset}: {page}")
+                status = "failed"
+                continue
+            news_data.extend(page[0])
+
+        filtered_articles = {}
+        for article in news_data:
+            if not (article.get("title") and article.get("description") and article.get("url")):  # Ensure required fields
+                continue
+            published_at = parse_published_at(article.get("published_at"))
+            if watermark and published_at and published_at <= watermark:
+                continue
+            filtered_articles[article["url"]] = {
+                "title": article["title"],
+                "description": article["description"],
+                "url": article["url"],
+                "image_link": article["image"],
+                "source": article.get("source"),
+                "published_at": article.get("published_at")
             }
 
-            response = requests.get(self.FETCH_API_URL, params=params)
-            response.raise_for_status()
+        logger.info(f"Fetched {len(news_data)} articles ({len(offsets) + 1} pages), {len(filtered_articles)} valid and newer than watermark")
+        return list(filtered_articles.values()), status
 
-            news_data = response.json().get("data", [])
+    def drop_known_articles(self, articles):
+        if not articles or self.content_collection is None:
+            return articles
+        known_urls = {
+            doc["url"]
+            for doc in self.content_collection.find({"url": {"$in": [article["url"] for article in articles]}}, {"url": 1})
+        }
+        logger.info(f"Dropping {len(known_urls)} already known articles")
+        return [article for article in articles if article["url"] not in known_urls]
 
-            filtered_articles = [
-                {
-                    "title": article["title"],
-                    "description": article["description"],
-                    "url": article["url"],
-                    "image_link": article["image"]
-                }
-                for article in news_data
-                if article.get("title") and article.get("description")  # Ensure required fields
-            ]
+    async def send_batch(self, client: httpx.AsyncClient, idx: int, total: int, batch) -> bool:
+        try:
+            response = await client.post(self.PROCESS_BATCH_API_URL, json=batch)
+            if response.status_code == 200:
+                logger.info(f"Batch {idx}/{total} - Sent {len(batch)} articles: {response.json()}")
+                return True
+            logger.warning(f"Batch {idx}/{total} - Failed to send {len(batch)} articles")
+            logger.warning(f"Response: {response.text}")
+        except httpx.HTTPError as e:
+            logger.error(f"Error sending article batch {idx}: {e}")
+        return False
 
-            logger.info(f"Fetched {len(filtered_articles)} valid articles")
-            return filtered_articles
+    async def send_articles(self, client: httpx.AsyncClient, articles) -> bool:
+        batches = [articles[i:i + self.upload_batch_size] for i in range(0, len(articles), self.upload_batch_size)]
+        results = await asyncio.gather(
+            *(self.send_batch(client, idx, len(batches), batch) for idx, batch in enumerate(batches, start=1))
+        )
+        return all(results)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching news: {e}")
-            return []
+    async def run_cycle(self):
+        watermark = await asyncio.to_thread(self.load_watermark)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
 
-    def send_articles(self, articles):
-        for idx, article in enumerate(articles, start=1):
-            try:
-                response = requests.post(self.PROCESS_API_URL, json=article)
-                if response.status_code == 200:
-                    logger.info(f"{idx}/{len(articles)} - Sent successfully: {article['title']}")
-                else:
-                    logger.warning(f"{idx}/{len(articles)} - Failed to send: {article['title']}")
-                    logger.warning(f"Response: {response.text}")
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SECONDS, limits=limits) as client:
+            articles, status = await self.fetch_news(client, watermark)
+            new_articles = await asyncio.to_thread(self.drop_known_articles, articles)
 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error sending article {idx}: {e}")
+            if new_articles:
+                uploaded = await self.send_articles(client, new_articles)
+            else:
+                logger.info("No new articles fetched, skipping upload.")
+                uploaded = True
+
+        # Only advance past articles that were actually handed to the content service
+        published = [parse_published_at(article["published_at"]) for article in articles]
+        published = [value for value in published if value]
+        if not (uploaded and published):
+            return
+
+        if watermark is None or status == "complete":
+            # First run: the unfiltered archive always exceeds the cap, so start from what was processed
+            new_watermark = max(published)
+        elif status == "capped":
+            # Pages are newest first: everything newer than the oldest processed article is done.
+            # The date filter is per day, so a busy day can stay above the cap; still make progress
+            new_watermark = max(watermark, min(published))
+            logger.warning(f"News fetch capped at {self.max_articles} articles, watermark advanced to the oldest processed article")
+        else:
+            # A failed page leaves a gap just above the old watermark; retry it next cycle
+            # (already stored urls are dropped on re-fetch)
+            logger.warning("News fetch had failed pages, keeping the previous watermark")
+            return
+
+        await asyncio.to_thread(self.save_watermark, new_watermark)
 
     def scheduled_job(self):
         logger.info("\n Running Scheduled Job: Fetching and Sending Articles")
-        articles = self.fetch_news()
-        if articles:
-            self.send_articles(articles)
-        else:
-            logger.info("No valid articles fetched, skipping upload.")
+        asyncio.run(self.run_cycle())
 
     def start_scheduler(self):
         self.scheduler.add_job(self.scheduled_job, "interval", hours=self.interval_hours)
@@ -73,5 +202,5 @@ class NewsScheduler:
             self.scheduler.start()
         except (KeyboardInterrupt, SystemExit):
             logger.info("\nScheduler stopped.")
-            
-scheduler = NewsScheduler(API_KEY, FETCH_API_URL, PROCESS_API_URL)
\ No newline at end of file
+
+scheduler = NewsScheduler(API_KEY, FETCH_API_URL, PROCESS_BATCH_API_URL)
@@ -0,0 +1,187 @@
+import argparse
+import sys
+import time
+from typing import List
+from transformers import AutoTokenizer
+from app.config.config import CLASSIFIER_MODEL, CLASSIFICATION, CLASSIFIER_EXPORT_DIR
+from app.config.logger_config import logger
+from app.db.mongo import mongo_db
+from app.services.content_classifier import ContentClassifier
+from app.services.inference_backend import export_onnx, export_torchscript
+
+# Usage (from content_service/):
+#   python -m app.tools.classifier_bench bench --limit 100
+#   python -m app.tools.classifier_bench bench --texts-file articles.txt
+#   CLASSIFY_PREFILTER_MODEL=sentence-transformers/all-MiniLM-L6-v2 python -m app.tools.classifier_bench cascade --k 3 5
+#   python -m app.tools.classifier_bench export --backend onnx
+#   python -m app.tools.classifier_bench parity --backend onnx --limit 50
+
+def load_texts(texts_file: str, limit: int) -> List[str]:
+    if texts_file:
+        with open(texts_file, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+
+    content_collection = mongo_db.get_collection("content")
+    if content_collection is None:
+        raise RuntimeError("MongoDB not connected and no --texts-file given")
+
+    cursor = content_collection.find({}, {"title": 1, "description": 1}).sort("created_at", -1).limit(limit)
+    return [f"{doc['title']}. {doc['description']}" for doc in cursor if doc.get("title")]
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def top_label_agreement(reference: List[dict], candidate: List[dict]) -> float:
+    if not reference:
+        return 1.0
+    matches = sum(
+        1 for ref, cand in zip(reference, candidate)
+        if ref["labels"][:1] == cand["labels"][:1]
+    )
+    return matches / len(reference)
+
+def all_pairs(classifier: ContentClassifier, texts: List[str]):
+    return [(text_idx, category_idx) for text_idx in range(len(texts)) for category_idx in range(len(classifier.categories))]
+
+def pretokenized_parity(classifier: ContentClassifier, texts: List[str], pairs) -> float:
+    reference = classifier._encode_pairs(texts, pairs)
+    spliced = classifier._encode_pairs_pretokenized(texts, pairs)
+    return sum(1 for ref, cand in zip(reference, spliced) if ref == cand) / max(len(pairs), 1)
+
+def run_bench(classifier: ContentClassifier, texts: List[str]):
+    sequential, sequential_time = timed(lambda: [classifier.classify([text])[0] for text in texts])
+    batched, batched_time = timed(classifier.classify, texts)
+
+    logger.info(f"Texts                 : {len(texts)}")
+    logger.info(f"Per-text loop         : {sequential_time:.2f} sec ({len(texts) / sequential_time:.1f} texts/sec)")
+    logger.info(f"Batched engine        : {batched_time:.2f} sec ({len(texts) / batched_time:.1f} texts/sec)")
+    logger.info(f"Speedup               : {sequential_time / batched_time:.2f}x")
+    logger.info(f"Top label agreement   : {top_label_agreement(sequential, batched):.2%}")
+
+    pairs = all_pairs(classifier, texts)
+    _, pair_tokenize_time = timed(classifier._encode_pairs, texts, pairs)
+    _, pretokenized_time = timed(classifier._encode_pairs_pretokenized, texts, pairs)
+    logger.info(f"Pair tokenization     : {pair_tokenize_time:.4f} sec")
+    logger.info(f"Pre-tokenized splice  : {pretokenized_time:.4f} sec")
+    logger.info(f"Encoding parity       : {pretokenized_parity(classifier, texts, pairs):.2%}")
+
+def candidate_recall(classifier: ContentClassifier, reference: List[dict], candidates: List[List[int]]):
+    relevant = 0
+    recalled = 0
+    top1_recalled = 0
+    for result, candidate_ids in zip(reference, candidates):
+        candidate_labels = {classifier.categories[idx] for idx in candidate_ids}
+        relevant += len(result["labels"])
+        recalled += sum(1 for label in result["labels"] if label in candidate_labels)
+        top1_recalled += 1 if result["labels"][:1] and result["labels"][0] in candidate_labels else 0
+    return recalled / max(relevant, 1), top1_recalled / max(len(reference), 1)
+
+def run_cascade_report(classifier: ContentClassifier, texts: List[str], k_values: List[int]):
+    prefilter = classifier.prefilter
+    if prefilter is None:
+        logger.error("Cascade report needs CLASSIFY_PREFILTER_MODEL to be set.")
+        return
+
+    configured_top_k = prefilter.top_k
+    classifier.prefilter = None
+    reference, full_time = timed(classifier.classify, texts)
+    classifier.prefilter = prefilter
+
+    logger.info(f"Texts: {len(texts)}, categories: {len(classifier.categories)}")
+    logger.info(f"Full NLI              : {full_time:.2f} sec ({len(texts) / full_time:.1f} texts/sec)")
+    logger.info(f"{'k':>3} | {'label recall':>12} | {'top-1 recall':>12} | {'prefilter':>9} | {'cascade':>8} | {'speedup':>7} | {'top-1 agree':>11}")
+
+    try:
+        for k in k_values:
+            prefilter.top_k = max(1, min(k, len(classifier.categories)))
+            candidates, prefilter_time = timed(prefilter.candidates, texts)
+            label_recall, top1_recall = candidate_recall(classifier, reference, candidates)
+            cascaded, cascade_time = timed(classifier.classify, texts)
+            logger.info(
+                f"{prefilter.top_k:>3} | {label_recall:>12.2%} | {top1_recall:>12.2%} | "
+                f"{prefilter_time:>8.2f}s | {cascade_time:>7.2f}s | {full_time / cascade_time:>6.2f}x | "
+                f"{top_label_agreement(reference, cascaded):>11.2%}"
+            )
+    finally:
+        prefilter.top_k = configured_top_k
+
+def score_matrix(classifier: ContentClassifier, texts: List[str]):
+    pairs = all_pairs(classifier, texts)
+    scores, _ = classifier._score_pairs(classifier._encode_pairs(texts, pairs), pairs, len(texts))
+    return scores
+
+def run_parity(texts: List[str], backend: str, tolerance: float) -> bool:
+    reference_classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION, prefilter_model=None, backend="torch")
+    candidate_classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION, prefilter_model=None, backend=backend)
+
+    reference, reference_time = timed(score_matrix, reference_classifier, texts)
+    candidate, candidate_time = timed(score_matrix, candidate_classifier, texts)
+
+    diff = (reference - candidate).abs()
+    threshold = reference_classifier.confidence_threshold
+    top1_agreement = (reference.argmax(dim=1) == candidate.argmax(dim=1)).float().mean().item()
+    decision_agreement = ((reference >= threshold) == (candidate >= threshold)).float().mean().item()
+    passed = diff.max().item() <= tolerance
+
+    logger.info(f"Backend               : torch vs {backend}")
+    logger.info(f"Texts                 : {len(texts)}")
+    logger.info(f"Max abs score diff    : {diff.max().item():.5f} (tolerance {tolerance})")
+    logger.info(f"Mean abs score diff   : {diff.mean().item():.5f}")
+    logger.info(f"Top label agreement   : {top1_agreement:.2%}")
+    logger.info(f"Threshold agreement   : {decision_agreement:.2%}")
+    logger.info(f"torch                 : {reference_time:.2f} sec ({len(texts) / reference_time:.1f} texts/sec)")
+    logger.info(f"{backend:<22}: {candidate_time:.2f} sec ({len(texts) / candidate_time:.1f} texts/sec)")
+    logger.info(f"Parity                : {'PASS' if passed else 'FAIL'}")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description="Content classifier benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = subparsers.add_parser("bench", help="Compare per-text and batched classification")
+    bench_parser.add_argument("--texts-file", help="File with one text per line (defaults to latest articles in MongoDB)")
+    bench_parser.add_argument("--limit", type=int, default=100)
+
+    cascade_parser = subparsers.add_parser("cascade", help="Recall/latency report for the prefilter cascade")
+    cascade_parser.add_argument("--texts-file", help="File with one text per line (defaults to latest articles in MongoDB)")
+    cascade_parser.add_argument("--limit", type=int, default=100)
+    cascade_parser.add_argument("--k", type=int, nargs="+", default=[2, 3, 5, 7])
+
+    export_parser = subparsers.add_parser("export", help="Export the classifier for an optimized backend")
+    export_parser.add_argument("--backend", choices=["onnx", "torchscript"], required=True)
+    export_parser.add_argument("--export-dir", default=CLASSIFIER_EXPORT_DIR)
+
+    parity_parser = subparsers.add_parser("parity", help="Compare a backend's scores against the torch backend")
+    parity_parser.add_argument("--backend", choices=["onnx", "torchscript"], required=True)
+    parity_parser.add_argument("--texts-file", help="File with one text per line (defaults to latest articles in MongoDB)")
+    parity_parser.add_argument("--limit", type=int, default=50)
+    parity_parser.add_argument("--tolerance", type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        tokenizer = AutoTokenizer.from_pretrained(CLASSIFIER_MODEL)
+        if args.backend == "onnx":
+            export_onnx(CLASSIFIER_MODEL, tokenizer, args.export_dir)
+        else:
+            export_torchscript(CLASSIFIER_MODEL, tokenizer, args.export_dir)
+        return
+
+    texts = load_texts(args.texts_file, args.limit)
+    if not texts:
+        logger.error("No texts available for benchmarking.")
+        return
+
+    if args.command == "parity":
+        sys.exit(0 if run_parity(texts, args.backend, args.tolerance) else 1)
+
+    classifier = ContentClassifier(CLASSIFIER_MODEL, CLASSIFICATION)
+    if args.command == "bench":
+        run_bench(classifier, texts)
+    elif args.command == "cascade":
+        run_cascade_report(classifier, texts, args.k)
+
+if __name__ == "__main__":
+    main()
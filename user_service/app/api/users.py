@@ -6,6 +6,6 @@ router = APIRouter()
 
 
 @router.post("/log-interest")
-def log_interest(request: UserLogInterest):
-    user_service.log_interest(request.email, request.interests)
+async def log_interest(request: UserLogInterest):
+    await user_service.log_interest(request.email, request.interests)
     return {"message": "User interest logged successfully"}
\ No newline at end of file
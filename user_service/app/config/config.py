@@ -5,6 +5,11 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 10000))
 if not MONGO_URI:
     raise ValueError("MONGO_URI is not set in environment variables!")
 
@@ -19,10 +24,29 @@ INTEREST_UPDATE_GROUP = os.getenv("INTEREST_UPDATE_GROUP")
 EMBEDDING_UPDATE = os.getenv("EMBEDDING_UPDATE")
 KAFKA_INTERACTION_UPDATE = os.getenv("KAFKA_INTERACTION_UPDATE")
 INTERACTION_UPDATE_GROUP=os.getenv("INTERACTION_UPDATE_GROUP")
+KAFKA_MAX_POLL_RECORDS = int(os.getenv("KAFKA_MAX_POLL_RECORDS", 100))
+KAFKA_POLL_TIMEOUT_MS = int(os.getenv("KAFKA_POLL_TIMEOUT_MS", 1000))
+KAFKA_RETRY_BACKOFF_SECONDS = float(os.getenv("KAFKA_RETRY_BACKOFF_SECONDS", 5))
+KAFKA_MAX_POLL_INTERVAL_MS = int(os.getenv("KAFKA_MAX_POLL_INTERVAL_MS", 300000))
+KAFKA_MAX_DELIVERY_ATTEMPTS = int(os.getenv("KAFKA_MAX_DELIVERY_ATTEMPTS", 5))
+KAFKA_DEAD_LETTER_SUFFIX = os.getenv("KAFKA_DEAD_LETTER_SUFFIX", ".dlq")
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", 5))
+REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", 5))
+
+RECOMMEND_TIMEOUT_SECONDS = float(os.getenv("RECOMMEND_TIMEOUT_SECONDS", 2))
+RECOMMEND_SEEN_EXCLUSION = os.getenv("RECOMMEND_SEEN_EXCLUSION", "filter")
+RECOMMEND_SEEN_LIMIT = int(os.getenv("RECOMMEND_SEEN_LIMIT", 500))
+RECOMMEND_OVERFETCH_BUDGET_SECONDS = float(os.getenv("RECOMMEND_OVERFETCH_BUDGET_SECONDS", 0.5))
+RECOMMEND_MAX_PAGE_SIZE = int(os.getenv("RECOMMEND_MAX_PAGE_SIZE", 200))
+EMBEDDING_VERSION_POLL_SECONDS = float(os.getenv("EMBEDDING_VERSION_POLL_SECONDS", 30))
+USER_VECTOR_CACHE_SIZE = int(os.getenv("USER_VECTOR_CACHE_SIZE", 10000))
+ARTICLE_CARD_CACHE_SIZE = int(os.getenv("ARTICLE_CARD_CACHE_SIZE", 20000))
+INTERACTION_STATE_TTL_SECONDS = int(os.getenv("INTERACTION_STATE_TTL_SECONDS", 7 * 24 * 3600))
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
@@ -0,0 +1,51 @@
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from app.config.logger_config import logger
+from app.db.mongo import mongo_db
+
+# Every index the service relies on, per collection. Applied at startup by
+# ``ensure_indexes``; ``python -m app.tools.mongo_indexes check`` diffs this
+# registry against the live collections.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "interaction": [
+        # Upsert key for interaction updates and the candidate filter's $in lookup
+        IndexModel([("userId", ASCENDING), ("articleId", ASCENDING)], name="user_article_unique", unique=True),
+        # Recent views, newest first. Partial rather than TTL: the same documents hold likes and shares
+        IndexModel(
+            [("userId", ASCENDING), ("action.view", DESCENDING)],
+            name="user_recent_views",
+            partialFilterExpression={"action.view": {"$exists": True}}
+        ),
+        IndexModel(
+            [("userId", ASCENDING), ("action.like", ASCENDING)],
+            name="user_liked",
+            partialFilterExpression={"action.like": True}
+        ),
+    ],
+}
+
+def ensure_indexes(db=None) -> Dict[str, List[str]]:
+    """Creates missing registry indexes; returns the names that could not be built."""
+    db = db if db is not None else mongo_db.db
+    failed = {}
+    if db is None:
+        logger.error("MongoDB not connected. Skipping index bootstrap.")
+        return failed
+
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                # Duplicate keys or a conflicting definition; the service still runs, just slower
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+                failed.setdefault(collection_name, []).append(name)
+
+    logger.info(f"Index bootstrap finished ({sum(len(i) for i in INDEXES.values())} indexes, {sum(len(f) for f in failed.values())} failed)")
+    return failed
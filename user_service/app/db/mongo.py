@@ -1,6 +1,19 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from app.config.logger_config import logger
-from app.config.config import MONGO_URI, DB_NAME
+from app.config.config import (
+    MONGO_URI, DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+)
+
+def _client_options():
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS
+    }
 
 class MongoDB:
     def __init__(self):
@@ -10,7 +23,7 @@ class MongoDB:
 
     def _connect(self):
         try:
-            self.client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+            self.client = MongoClient(MONGO_URI, **_client_options())
             self.db = self.client[DB_NAME]
             self.client.admin.command("ping")
             logger.info(f"Connected to MongoDB: {DB_NAME}")
@@ -32,4 +45,50 @@ class MongoDB:
             logger.info(f"MongoDB connection to {DB_NAME} closed")
 
 
-mongo_db = MongoDB()
\ No newline at end of file
+class AsyncMongoDB:
+    """Motor client for request handlers running on the event loop.
+
+    Kafka listener threads keep using the synchronous ``mongo_db``.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self._connect()
+
+    def _connect(self):
+        try:
+            # Motor connects lazily, so this never blocks; ``ping`` verifies the connection
+            self.client = AsyncIOMotorClient(MONGO_URI, **_client_options())
+            self.db = self.client[DB_NAME]
+        except Exception as e:
+            logger.error(f"Unexpected async MongoDB Error: {e}")
+            self.client = None
+
+    async def ping(self):
+        if self.client is None:
+            return False
+        try:
+            await self.client.admin.command("ping")
+            logger.info(f"Connected to MongoDB (async): {DB_NAME}")
+            return True
+        except Exception as e:
+            logger.error(f"Async MongoDB ping failed: {e}")
+            return False
+
+    def get_collection(self, collection_name):
+        if self.client is None:
+            logger.error("Async MongoDB not connected. Attempting to reconnect")
+            self._connect()
+            if self.client is None:
+                return None
+        return self.db[collection_name]
+
+    def close_connection(self):
+        if self.client:
+            self.client.close()
+            logger.info(f"Async MongoDB connection to {DB_NAME} closed")
+
+
+mongo_db = MongoDB()
+async_mongo_db = AsyncMongoDB()
\ No newline at end of file
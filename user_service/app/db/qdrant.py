@@ -1,9 +1,13 @@
 from typing import List, Dict
-from qdrant_client import QdrantClient, models
+import uuid
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
 from qdrant_client.http.models import Distance, VectorParams
 from app.config.logger_config import logger
 from app.config.config import QDRANT_TOKEN,QDRANT_HOST,QDRANT_COLLECTION
 
+def article_point_id(article_id: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, str(article_id)))
+
 class QdrantDB:
     def __init__(self,collection_name: str = QDRANT_COLLECTION):
         try:
@@ -11,6 +15,10 @@ class QdrantDB:
                 url=QDRANT_HOST, 
                 api_key=QDRANT_TOKEN,
             )
+            self.async_client = AsyncQdrantClient(
+                url=QDRANT_HOST,
+                api_key=QDRANT_TOKEN,
+            )
             
             self.collection_name = collection_name
             self._initialize_collection()
@@ -18,6 +26,7 @@ class QdrantDB:
         except Exception as e:
             logger.error(f"Qdrant Connection Failed: {e}")
             self.client = None
+            self.async_client = None
         
     def _initialize_collection(self):
         try:
@@ -35,7 +44,7 @@ class QdrantDB:
             return
         
         points = [
-            models.PointStruct(id=vec["id"], vector=vec["vector"], payload={"mongo_id": vec["mongo_id"]})
+            models.PointStruct(id=vec["id"], vector=vec["vector"], payload={"mongo_id": vec["mongo_id"], **(vec.get("card") or {})})
             for vec in vectors
         ]
 
@@ -77,6 +86,40 @@ class QdrantDB:
             logger.error(f"Qdrant Search Error: {e}")
             return []
 
+    async def search_vector_async(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        offset: int = 0,
+        exclude_ids: List[str] = None
+    ):
+        if self.async_client is None:
+            logger.error("Qdrant client is not connected.")
+            return []
+
+        query_filter = None
+        if exclude_ids:
+            query_filter = models.Filter(must_not=[models.HasIdCondition(has_id=exclude_ids)])
+
+        try:
+            results = await self.async_client.search(
+                collection_name=collection_name,
+                query_vector=query_vector,
+                query_filter=query_filter,
+                limit=top_k,
+                offset=offset
+            )
+            logger.info(f"Search in '{collection_name}' returned {len(results)} results.")
+            return results
+        except Exception as e:
+            logger.error(f"Qdrant Search Error: {e}")
+            return []
+
+    async def close_async(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+
     def search_similar_users(self, query_embedding: List[float], top_k: int = 30) -> List[Dict]:
         if self.client is None:
             logger.error("Qdrant client is not connected.")
@@ -1,59 +1,182 @@
 import redis
+import redis.asyncio as aioredis
 import json
 import time
 import threading
 from datetime import datetime,timezone
+from typing import Any, Dict, List, Tuple
 from app.config.logger_config import logger
-from app.config.config import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD
+from app.config.config import (
+    REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT_SECONDS, REDIS_SOCKET_TIMEOUT_SECONDS
+)
 from app.db.mongo import mongo_db
 
+EXPIRING_KEYS = "expiring_keys"
+
+# KEYS: counter, cooldown, target, expiring_keys
+# ARGV: limit, counter ttl, cooldown ttl, target value, target ttl, soft expiry
+# Returns the new counter value, -1 when the limit is reached, -2 while cooling down
+THROTTLED_SET = """
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count >= tonumber(ARGV[1]) then
+    return -1
+end
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return -2
+end
+count = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+redis.call('SET', KEYS[3], ARGV[4], 'EX', ARGV[5])
+redis.call('ZADD', KEYS[4], ARGV[6], KEYS[3])
+return count
+"""
+
+def _pool_options():
+    return {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "password": REDIS_PASSWORD,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        # Callers wait this long for a free connection instead of failing once the pool is exhausted
+        "timeout": REDIS_POOL_TIMEOUT_SECONDS,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT_SECONDS,
+        "socket_connect_timeout": REDIS_SOCKET_TIMEOUT_SECONDS
+    }
+
+def _envelope(value, expiry: int):
+    expiry_time = datetime.now(timezone.utc).timestamp() + expiry
+    return json.dumps({"data": value, "_expiry": expiry_time}), expiry_time - 2
+
+def _decode(data):
+    return json.loads(data) if data else None
+
 class RedisCache:
     def __init__(self):
         try:
-            self.client = redis.Redis(
-                host=REDIS_HOST,
-                port=REDIS_PORT,
-                password=REDIS_PASSWORD,
-                ssl=True
-            )
+            # Both pools are sized explicitly; the sync one is shared by the Kafka threads and the expiry poller
+            self.pool = redis.BlockingConnectionPool(connection_class=redis.SSLConnection, **_pool_options())
+            self.client = redis.Redis(connection_pool=self.pool)
+            # Used by async request handlers so cache reads never block the event loop
+            self.async_pool = aioredis.BlockingConnectionPool(connection_class=aioredis.SSLConnection, **_pool_options())
+            self.async_client = aioredis.Redis(connection_pool=self.async_pool)
+            self.throttled_set_script = self.client.register_script(THROTTLED_SET)
             self.user_collection = mongo_db.get_collection("users")
             self.start_expiry_monitor()
             logger.info("Redis Connected Successfully.")
         except redis.ConnectionError as e:
             logger.error(f"Redis Connection Failed: {e}")
             self.client = None
+            self.async_client = None
 
     def set_cache(self, key: str, value: dict, expiry: int = 3600):
         if not self.client:
             logger.error("Redis Not Initialized! Cannot set cache.")
             return False
         try:
-            expiry_time = datetime.now(timezone.utc).timestamp() + expiry
-            soft_expiry_time = expiry_time - 2
-            value = {"data": value}
-            
-            value["_expiry"] = expiry_time
-
-            self.client.setex(key, expiry, json.dumps(value))
-            self.client.zadd("expiring_keys", {key: soft_expiry_time})
+            payload, soft_expiry_time = _envelope(value, expiry)
+            pipe = self.client.pipeline(transaction=False)
+            pipe.setex(key, expiry, payload)
+            pipe.zadd(EXPIRING_KEYS, {key: soft_expiry_time})
+            pipe.execute()
             logger.info(f"Cached data for key: '{key}' (Expires in {expiry} sec)")
             return True
         except redis.RedisError as e:
             logger.error(f"Redis Set Cache Error: {e}")
         return False
 
+    def set_many(self, entries: List[Tuple[str, Any, int]]):
+        """Caches (key, value, expiry) entries in one round trip."""
+        if not self.client:
+            logger.error("Redis Not Initialized! Cannot set cache.")
+            return False
+        if not entries:
+            return True
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            soft_expiries = {}
+            for key, value, expiry in entries:
+                payload, soft_expiries[key] = _envelope(value, expiry)
+                pipe.setex(key, expiry, payload)
+            pipe.zadd(EXPIRING_KEYS, soft_expiries)
+            pipe.execute()
+            logger.info(f"Cached data for keys: {list(soft_expiries)}")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Redis Set Cache Error: {e}")
+        return False
+
     def get_cache(self, key: str):
         if not self.client:
             logger.error("Redis Not Initialized! Cannot get cache.")
             return None
 
         try:
-            data = self.client.get(key)
-            return json.loads(data) if data else None
+            return _decode(self.client.get(key))
         except (redis.RedisError, json.JSONDecodeError) as e:
             logger.error(f"Redis Get Cache Error: {e}")
         return None
+
+    def mget_cache(self, keys: List[str]) -> Dict[str, Any]:
+        """Cached envelopes for ``keys`` in one MGET; missing keys map to None."""
+        if not self.client:
+            logger.error("Redis Not Initialized! Cannot get cache.")
+            return {key: None for key in keys}
+        if not keys:
+            return {}
+        try:
+            return {key: _decode(data) for key, data in zip(keys, self.client.mget(keys))}
+        except (redis.RedisError, json.JSONDecodeError) as e:
+            logger.error(f"Redis Get Cache Error: {e}")
+        return {key: None for key in keys}
     
+    async def set_cache_async(self, key: str, value: dict, expiry: int = 3600):
+        return await self.set_many_async([(key, value, expiry)])
+
+    async def set_many_async(self, entries: List[Tuple[str, Any, int]]):
+        if not self.async_client:
+            logger.error("Redis Not Initialized! Cannot set cache.")
+            return False
+        if not entries:
+            return True
+        try:
+            soft_expiries = {}
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                for key, value, expiry in entries:
+                    payload, soft_expiries[key] = _envelope(value, expiry)
+                    pipe.setex(key, expiry, payload)
+                pipe.zadd(EXPIRING_KEYS, soft_expiries)
+                await pipe.execute()
+            logger.info(f"Cached data for keys: {list(soft_expiries)}")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Redis Set Cache Error: {e}")
+        return False
+
+    async def get_cache_async(self, key: str):
+        if not self.async_client:
+            logger.error("Redis Not Initialized! Cannot get cache.")
+            return None
+
+        try:
+            return _decode(await self.async_client.get(key))
+        except (redis.RedisError, json.JSONDecodeError) as e:
+            logger.error(f"Redis Get Cache Error: {e}")
+        return None
+
+    async def mget_cache_async(self, keys: List[str]) -> Dict[str, Any]:
+        if not self.async_client:
+            logger.error("Redis Not Initialized! Cannot get cache.")
+            return {key: None for key in keys}
+        if not keys:
+            return {}
+        try:
+            return {key: _decode(data) for key, data in zip(keys, await self.async_client.mget(keys))}
+        except (redis.RedisError, json.JSONDecodeError) as e:
+            logger.error(f"Redis Get Cache Error: {e}")
+        return {key: None for key in keys}
+
     def set_value(self, key: str, value: str, expiry: int):
         if not self.client:
             logger.error("Redis Not Initialized! Cannot set value.")
@@ -73,7 +196,8 @@ class RedisCache:
             return None
 
         try:
-            return self.client.get(key).decode() if self.client.get(key) else None
+            value = self.client.get(key)
+            return value.decode() if value else None
         except redis.RedisError as e:
             logger.error(f"Redis Get Value Error: {e}")
         return None
@@ -92,6 +216,29 @@ class RedisCache:
             logger.error(f"Redis Increment Key Error: {e}")
         return None
 
+    def throttled_set_cache(
+        self, key: str, value: dict, expiry: int,
+        counter_key: str, limit: int, window: int,
+        cooldown_key: str, cooldown: int
+    ):
+        """Atomically rate-limits and caches ``value``: one round trip instead of check-then-set.
+
+        Returns the request count within ``window`` on success, -1 when
+        ``limit`` is reached, -2 during ``cooldown``, or None on Redis errors.
+        """
+        if not self.client:
+            logger.error("Redis Not Initialized! Cannot set cache.")
+            return None
+        try:
+            payload, soft_expiry_time = _envelope(value, expiry)
+            return self.throttled_set_script(
+                keys=[counter_key, cooldown_key, key, EXPIRING_KEYS],
+                args=[limit, window, cooldown, payload, expiry, soft_expiry_time]
+            )
+        except redis.RedisError as e:
+            logger.error(f"Redis Throttled Set Error: {e}")
+        return None
+
     def delete_key(self, key: str):
         if not self.client:
             logger.error("Redis Not Initialized! Cannot delete key.")
@@ -104,6 +251,19 @@ class RedisCache:
         except redis.RedisError as e:
             logger.error(f"Redis Delete Key Error: {e}")
         return False
+
+    async def delete_key_async(self, key: str):
+        if not self.async_client:
+            logger.error("Redis Not Initialized! Cannot delete key.")
+            return False
+
+        try:
+            await self.async_client.delete(key)
+            logger.info(f"Deleted key: '{key}' from Redis.")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Redis Delete Key Error: {e}")
+        return False
     
     def remove_user_from_cache(self, email):
         try:
@@ -116,8 +276,7 @@ class RedisCache:
                 self.user_collection.update_one(
                     {"email": email}, {"$set": {"interests": interest_data}}, upsert=True
                 )
-                self.delete_key(redis_user_key)
-                self.delete_key(redis_interest_key)
+                self.client.delete(redis_user_key, redis_interest_key)
                 logger.info(f"User {email} interest saved to MongoDB & removed from Redis.")
 
         except Exception as e:
@@ -127,9 +286,8 @@ class RedisCache:
         while True:
             try:
                 current_time = datetime.now(timezone.utc).timestamp()
-                expired_keys = self.client.zrangebyscore("expiring_keys", 0, current_time)
-                
-                
+                expired_keys = self.client.zrangebyscore(EXPIRING_KEYS, 0, current_time)
+
                 for key in expired_keys:
                     key = key.decode()
                     if key.startswith("user:") and key.endswith(":interest"):
@@ -137,7 +295,8 @@ class RedisCache:
                         logger.info(f"Key expired: {key}, removing user {email} from cache.")
                         self.remove_user_from_cache(email)
 
-                    self.client.zrem("expiring_keys", key)
+                if expired_keys:
+                    self.client.zrem(EXPIRING_KEYS, *expired_keys)
 
                 time.sleep(1)
 
@@ -154,4 +313,9 @@ class RedisCache:
             self.client.close()
             logger.info("Redis Connection Closed.")
 
+    async def close_async(self):
+        if self.async_client:
+            await self.async_client.aclose()
+            logger.info("Async Redis Connection Closed.")
+
 redis_cache = RedisCache()
\ No newline at end of file
@@ -1,14 +1,22 @@
 import threading
-from kafka import KafkaConsumer
+from kafka import KafkaConsumer, KafkaProducer
+from kafka.structs import OffsetAndMetadata
 import json
 import logging
-from app.config.config import KAFKA_BROKER
+from app.config.config import (
+    KAFKA_BROKER, KAFKA_MAX_POLL_RECORDS, KAFKA_POLL_TIMEOUT_MS, KAFKA_RETRY_BACKOFF_SECONDS,
+    KAFKA_MAX_POLL_INTERVAL_MS, KAFKA_MAX_DELIVERY_ATTEMPTS, KAFKA_DEAD_LETTER_SUFFIX
+)
 
 class KafkaEventConsumer:
     def __init__(self, topic: str, group_id: str, auto_offset_reset="latest"):
         self.topic = topic
         self.group_id = group_id
         self.auto_offset_reset = auto_offset_reset
+        self.stop_event = threading.Event()
+        # Failed deliveries per (partition, first offset of the chunk), cleared once the chunk succeeds
+        self.attempts = {}
+        self.dead_letter_producer = None
 
     def safe_deserializer(self, x):
         try:
@@ -25,32 +33,110 @@ class KafkaEventConsumer:
                 auto_offset_reset=self.auto_offset_reset,
                 enable_auto_commit=False,
                 group_id=self.group_id,
-                value_deserializer=self.safe_deserializer
+                value_deserializer=self.safe_deserializer,
+                consumer_timeout_ms=1000,
+                max_poll_interval_ms=KAFKA_MAX_POLL_INTERVAL_MS
             )
         except Exception as e:
             logging.error(f"Error creating Kafka Consumer: {e}")
             return None
 
-    def listen(self, callback):
+    def _dead_letter(self, tp, chunk, error) -> bool:
+        """Publishes a chunk that keeps failing to ``<topic><KAFKA_DEAD_LETTER_SUFFIX>`` so the partition can move on."""
+        dead_letter_topic = f"{self.topic}{KAFKA_DEAD_LETTER_SUFFIX}"
+        try:
+            if self.dead_letter_producer is None:
+                self.dead_letter_producer = KafkaProducer(
+                    bootstrap_servers=KAFKA_BROKER,
+                    value_serializer=lambda v: json.dumps(v, default=str).encode("utf-8")
+                )
+            for message in chunk:
+                self.dead_letter_producer.send(dead_letter_topic, {
+                    "source_topic": tp.topic,
+                    "partition": tp.partition,
+                    "offset": message.offset,
+                    "error": str(error),
+                    "value": message.value
+                })
+            self.dead_letter_producer.flush()
+        except Exception as e:
+            logging.error(f"Could not dead-letter {len(chunk)} messages from '{self.topic}', will retry: {e}")
+            return False
+
+        logging.error(
+            f"Moved {len(chunk)} messages from {tp.topic}[{tp.partition}] at offset {chunk[0].offset} "
+            f"to '{dead_letter_topic}' after {KAFKA_MAX_DELIVERY_ATTEMPTS} failed attempts: {error}"
+        )
+        return True
+
+    def _process_records(self, consumer, records, callback, chunk_size) -> bool:
+        """Runs ``callback`` per chunk of each partition and commits after every chunk.
+
+        On failure the failed chunk and everything after it in the poll are
+        rewound for redelivery; returns False in that case.
+        """
+        partitions = list(records.items())
+        for idx, (tp, messages) in enumerate(partitions):
+            step = chunk_size or len(messages)
+            for start in range(0, len(messages), step):
+                chunk = messages[start:start + step]
+                values = [message.value for message in chunk if message.value is not None]
+                if len(values) < len(chunk):
+                    logging.warning(f"Skipping {len(chunk) - len(values)} empty or invalid messages from {tp.topic}")
+
+                if values:
+                    key = (tp, chunk[0].offset)
+                    try:
+                        callback(values)
+                    except Exception as e:
+                        self.attempts[key] = self.attempts.get(key, 0) + 1
+                        if self.attempts[key] < KAFKA_MAX_DELIVERY_ATTEMPTS or not self._dead_letter(tp, chunk, e):
+                            logging.error(
+                                f"Batch from '{self.topic}' failed (attempt {self.attempts[key]}/{KAFKA_MAX_DELIVERY_ATTEMPTS}), "
+                                f"rewinding for redelivery: {e}", exc_info=True
+                            )
+                            consumer.seek(tp, chunk[0].offset)
+                            for later_tp, later_messages in partitions[idx + 1:]:
+                                consumer.seek(later_tp, later_messages[0].offset)
+                            return False
+                    self.attempts.pop(key, None)
+
+                consumer.commit({tp: OffsetAndMetadata(chunk[-1].offset + 1, None, -1)})
+        return True
+
+    def listen_batch(self, callback, max_records=KAFKA_MAX_POLL_RECORDS, timeout_ms=KAFKA_POLL_TIMEOUT_MS, chunk_size=None):
+        """Consume in batches: ``callback`` gets a list of message values.
+
+        Each poll is split per partition into chunks of ``chunk_size``
+        messages (the whole partition batch by default), and a chunk's offsets
+        are committed as soon as its callback returns. A failing chunk is
+        rewound and redelivered; after ``KAFKA_MAX_DELIVERY_ATTEMPTS`` it is
+        moved to the dead-letter topic. ``max_records`` bounds the work done
+        between polls, which must stay under ``KAFKA_MAX_POLL_INTERVAL_MS``.
+        """
         def _consume():
             consumer = self._create_consumer()
             if not consumer:
                 logging.error("Kafka Consumer failed to initialize. Exiting thread.")
                 return
-            logging.info(f"Kafka Consumer started listening on topic: {self.topic}")
+            logging.info(f"Kafka Consumer started batch listening on topic: {self.topic} (max_records={max_records})")
             try:
-                for message in consumer:
-                    data = message.value
-                    if data is None:
-                        logging.warning(f"Skipping empty or invalid message from {message.topic}")
+                while not self.stop_event.is_set():
+                    records = consumer.poll(timeout_ms=timeout_ms, max_records=max_records)
+                    if not records:
                         continue
-                    logging.info(f"Message received from '{message.topic}': {message.value}")
-                    callback(data)
-                consumer.commit()
+
+                    logging.info(f"Received batch of {sum(len(messages) for messages in records.values())} messages from '{self.topic}'")
+                    if not self._process_records(consumer, records, callback, chunk_size):
+                        self.stop_event.wait(KAFKA_RETRY_BACKOFF_SECONDS)
+                consumer.close()
             except Exception as e:
                 logging.error(f"Kafka Consumer Error: {e}")
                 consumer.close()
-                self.listen(callback)
+                if not self.stop_event.is_set():
+                    self.listen_batch(callback, max_records, timeout_ms, chunk_size)
+
+        threading.Thread(target=_consume, daemon=True).start()
 
-        
-        threading.Thread(target=_consume, daemon=True).start()
\ No newline at end of file
+    def stop(self):
+        self.stop_event.set()
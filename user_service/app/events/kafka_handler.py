@@ -1,11 +1,12 @@
 import threading
-import uuid
+import numpy as np
 from app.config.logger_config import logger
 from app.events.kafka_consumer import KafkaEventConsumer
-from app.db.qdrant import qdrant_db
+from app.db.qdrant import qdrant_db, article_point_id
 from app.services.generate_embedding import embedding_service
 from app.services.user import user_service
 from app.services.recommend_service import recommend_service
+from app.services.article_cards import article_card_store, build_card
 from app.config.config import KAFKA_EMBEDDING_UPDATE_TOPIC,KAFKA_BALANCE_INTEREST_TOPIC,EMBEDDING_UPDATE,INTEREST_UPDATE_GROUP,KAFKA_INTERACTION_UPDATE,INTERACTION_UPDATE_GROUP
 
 class UserServiceKafkaHandler:
@@ -13,6 +14,7 @@ class UserServiceKafkaHandler:
         self.embedding_service = embedding_service 
         self.user_service = user_service
         self.recommend_service = recommend_service
+        self.article_card_store = article_card_store
         
         self.embedding_update_consumer = KafkaEventConsumer(
             topic=KAFKA_EMBEDDING_UPDATE_TOPIC,
@@ -35,75 +37,101 @@ class UserServiceKafkaHandler:
         threading.Thread(target=self.interest_balance_listener, daemon=True).start()
         threading.Thread(target=self.process_interaction_update, daemon=True).start()
         
+    def stop_listeners(self):
+        self.embedding_update_consumer.stop()
+        self.interest_update_consumer.stop()
+        self.interaction_update_consumer.stop()
+
     def embedding_listener(self):
-        self.embedding_update_consumer.listen(self.process_embedding_update)
+        self.embedding_update_consumer.listen_batch(self.process_embedding_updates)
     
     def interest_balance_listener(self):
-        self.interest_update_consumer.listen(self.user_service.process_interest_update)
+        self.interest_update_consumer.listen_batch(self.user_service.process_interest_updates)
         
     def process_interaction_update(self):
-        self.interaction_update_consumer.listen(self.recommend_service.process_user_interaction_update)
+        self.interaction_update_consumer.listen_batch(self.recommend_service.process_user_interaction_updates)
         
     def process_embedding_update(self, event):
         try:
-            filtered_articles = event.get("filtered_articles", [])
-            if not filtered_articles:
-                logger.info("No articles received for embedding update.")
-                return
-
-            logger.info(f"Processing embedding update for {len(filtered_articles)} articles.")
-
-            new_articles = []
-
-            for article in filtered_articles:
-                article_id = str(article.get("id"))
-                if not article_id:
-                    logger.warning("Skipping article with missing ID.")
-                    continue  
-
-                try:
-                    mongo_id = str(article_id)
-                    qdrant_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, article_id))
-                except ValueError:
-                    logger.error(f"Invalid article_id format: {article_id}")
-                    continue
-
-                category_embedding = self.embedding_service.get_embedding(article.get("category", ""))
-                if category_embedding is None:
-                    logger.warning(f"No embedding found for category '{article.get('category', '')}', using zero vector.")
-                    category_embedding = [0.0] * 14
-
-                tag_embeddings = [
-                    self.embedding_service.get_embedding(tag) or [0.0] * 14
-                    for tag in article.get("tags", [])
-                ]
-
-                category_weight = 0.7
-                tag_weight = 0.3 / max(len(tag_embeddings), 1)
-
-                updated_embedding = [
-                    category_weight * c + sum(tag_weight * t[i] for t in tag_embeddings)
-                    for i, c in enumerate(category_embedding)
-                ]
-
-                interaction = article.get("interactionMetrics", {})
-                interaction_factor = (
-                    interaction.get("likes", 0) * 0.4 +
-                    interaction.get("shares", 0) * 0.3 +
-                    interaction.get("clicks", 0) * 0.3
-                )
-                updated_embedding = [e + interaction_factor for e in updated_embedding]
-                new_articles.append({"id": qdrant_id, "vector": updated_embedding,"mongo_id": mongo_id})
-
-            if new_articles:
-                qdrant_db.upsert_vectors("content_embeddings", new_articles)
-                logger.info(f"Upserted {len(new_articles)} new embeddings to Qdrant.")
-
-            logger.info("Qdrant embeddings updated successfully.")
-
+            self.process_embedding_updates([event])
         except Exception as e:
             logger.error(f"Error processing embedding update: {e}", exc_info=True)
 
+    def process_embedding_updates(self, events):
+        # Later events win when the same article shows up more than once in a batch
+        articles_by_id = {}
+        for event in events:
+            for article in event.get("filtered_articles", []):
+                articles_by_id[str(article.get("id"))] = article
+
+        filtered_articles = list(articles_by_id.values())
+        if not filtered_articles:
+            logger.info("No articles received for embedding update.")
+            return
+
+        logger.info(f"Processing embedding update for {len(filtered_articles)} articles from {len(events)} events.")
+
+        valid_articles = []
+
+        for article in filtered_articles:
+            article_id = str(article.get("id"))
+            if not article_id:
+                logger.warning("Skipping article with missing ID.")
+                continue  
+
+            try:
+                qdrant_id = article_point_id(article_id)
+            except ValueError:
+                logger.error(f"Invalid article_id format: {article_id}")
+                continue
+
+            if article.get("category", "") not in self.embedding_service.topic_index:
+                logger.warning(f"No embedding found for category '{article.get('category', '')}', using zero vector.")
+            valid_articles.append((qdrant_id, article_id, article))
+
+        # All article vectors in one matrix product, then the engagement offset per row
+        vectors = self.embedding_service.embed_articles(
+            [article.get("category", "") for _, _, article in valid_articles],
+            [article.get("tags", []) for _, _, article in valid_articles]
+        )
+        interaction_factors = np.array(
+            [self._interaction_factor(article.get("interactionMetrics") or {}) for _, _, article in valid_articles],
+            dtype=np.float32
+        )
+        vectors += interaction_factors[:, None]
+
+        # Engagement-only updates carry no card fields; keep the stored card so the upsert does not drop it
+        fresh_cards = {
+            mongo_id: build_card(article)
+            for _, mongo_id, article in valid_articles
+            if article.get("title")
+        }
+        stored_cards = self.article_card_store.get_many([
+            mongo_id for _, mongo_id, _ in valid_articles if mongo_id not in fresh_cards
+        ])
+        self.article_card_store.put_many(fresh_cards)
+
+        new_articles = []
+        for (qdrant_id, mongo_id, article), vector in zip(valid_articles, vectors):
+            card = fresh_cards.get(mongo_id)
+            if card is None and mongo_id in stored_cards:
+                card = {**stored_cards[mongo_id], "category": article.get("category"), "tags": article.get("tags", [])}
+            new_articles.append({"id": qdrant_id, "vector": vector.tolist(), "mongo_id": mongo_id, "card": card})
+
+        if new_articles:
+            qdrant_db.upsert_vectors("content_embeddings", new_articles)
+            logger.info(f"Upserted {len(new_articles)} new embeddings to Qdrant.")
+
+        logger.info("Qdrant embeddings updated successfully.")
+
+    @staticmethod
+    def _interaction_factor(interaction: dict) -> float:
+        return (
+            interaction.get("likes", 0) * 0.4 +
+            interaction.get("shares", 0) * 0.3 +
+            interaction.get("clicks", 0) * 0.3
+        )
+
 
 user_service_kafka = UserServiceKafkaHandler()
 user_service_kafka.start_listeners()
\ No newline at end of file
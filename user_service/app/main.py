@@ -5,15 +5,29 @@ from app.api.users import router as user_api
 from app.api.recommend import router as recommend_api
 from app.events.kafka_handler import user_service_kafka
 from app.api.auth import router as auth_api
+from app.db.mongo import async_mongo_db
+from app.db.indexes import ensure_indexes
+from app.db.redis_cache import redis_cache
+from app.db.qdrant import qdrant_db
+from app.services.generate_embedding import embedding_service
+import asyncio
 import threading
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("User Service Starting...")
+    await async_mongo_db.ping()
+    await asyncio.to_thread(ensure_indexes)
+    embedding_service.start_watcher()
     listener_thread = threading.Thread(target=user_service_kafka.start_listeners, daemon=True)
     listener_thread.start()
     yield
     logger.info("User Service Shutting Down...")
+    user_service_kafka.stop_listeners()
+    embedding_service.stop_watcher()
+    async_mongo_db.close_connection()
+    await redis_cache.close_async()
+    await qdrant_db.close_async()
 
 app = FastAPI(title="User Service", lifespan=lifespan)
 
@@ -0,0 +1,118 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+import redis
+from bson import ObjectId
+from app.config.logger_config import logger
+from app.config.config import ARTICLE_CARD_CACHE_SIZE
+from app.db.mongo import async_mongo_db
+from app.db.redis_cache import redis_cache
+
+CARD_FIELDS = ("title", "description", "url", "image_link", "category", "tags", "published_at")
+CARDS_KEY = "article_cards"
+
+def build_card(article: Dict) -> Dict:
+    return {field: article.get(field) for field in CARD_FIELDS}
+
+
+class ArticleCardStore:
+    """Denormalized article cards: everything a recommendation response shows.
+
+    Cards are written to the ``article_cards`` Redis hash (and into the Qdrant
+    payload) when the content service publishes a classified article. Reads
+    go in-process LRU -> Redis -> content collection, and each layer warms
+    the ones above it.
+    """
+
+    def __init__(self, max_entries: int = ARTICLE_CARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.cards = OrderedDict()
+        self.lock = threading.Lock()
+        self.redis_cache = redis_cache
+        self.async_content_collection = async_mongo_db.get_collection("content")
+
+    def _remember(self, cards: Dict[str, Dict]):
+        with self.lock:
+            for article_id, card in cards.items():
+                self.cards[article_id] = card
+                self.cards.move_to_end(article_id)
+            while len(self.cards) > self.max_entries:
+                self.cards.popitem(last=False)
+
+    def _cached(self, article_ids: List[str]) -> Dict[str, Dict]:
+        with self.lock:
+            found = {article_id: self.cards[article_id] for article_id in article_ids if article_id in self.cards}
+            for article_id in found:
+                self.cards.move_to_end(article_id)
+        return found
+
+    def put_many(self, cards: Dict[str, Dict]):
+        if not cards:
+            return
+        self._remember(cards)
+        if not self.redis_cache.client:
+            return
+        try:
+            self.redis_cache.client.hset(CARDS_KEY, mapping={
+                article_id: json.dumps(card, default=str) for article_id, card in cards.items()
+            })
+        except redis.RedisError as e:
+            logger.error(f"Error storing article cards: {e}")
+
+    async def put_many_async(self, cards: Dict[str, Dict]):
+        if not cards:
+            return
+        self._remember(cards)
+        if not self.redis_cache.async_client:
+            return
+        try:
+            await self.redis_cache.async_client.hset(CARDS_KEY, mapping={
+                article_id: json.dumps(card, default=str) for article_id, card in cards.items()
+            })
+        except redis.RedisError as e:
+            logger.error(f"Error storing article cards: {e}")
+
+    def get_many(self, article_ids: List[str]) -> Dict[str, Dict]:
+        """Synchronous lookup for the Kafka threads; LRU and Redis only."""
+        found = self._cached(article_ids)
+        missing = [article_id for article_id in article_ids if article_id not in found]
+        if missing and self.redis_cache.client:
+            try:
+                values = self.redis_cache.client.hmget(CARDS_KEY, missing)
+            except redis.RedisError as e:
+                logger.error(f"Error reading article cards: {e}")
+                values = []
+            fetched = {article_id: json.loads(value) for article_id, value in zip(missing, values) if value}
+            self._remember(fetched)
+            found.update(fetched)
+        return found
+
+    async def get_many_async(self, article_ids: List[str]) -> Dict[str, Dict]:
+        found = self._cached(article_ids)
+
+        missing = [article_id for article_id in article_ids if article_id not in found]
+        if missing and self.redis_cache.async_client:
+            try:
+                values = await self.redis_cache.async_client.hmget(CARDS_KEY, missing)
+            except redis.RedisError as e:
+                logger.error(f"Error reading article cards: {e}")
+                values = []
+            fetched = {article_id: json.loads(value) for article_id, value in zip(missing, values) if value}
+            self._remember(fetched)
+            found.update(fetched)
+
+        missing = [article_id for article_id in article_ids if article_id not in found]
+        if missing:
+            # Articles classified before cards existed; backfill them once from the content collection
+            object_ids = [ObjectId(article_id) for article_id in missing if ObjectId.is_valid(article_id)]
+            projection = {field: 1 for field in CARD_FIELDS}
+            docs = await self.async_content_collection.find({"_id": {"$in": object_ids}}, projection).to_list(length=None)
+            fetched = {str(doc["_id"]): build_card(doc) for doc in docs}
+            logger.info(f"Backfilled {len(fetched)} article cards from the content collection")
+            found.update(fetched)
+            await self.put_many_async(fetched)
+
+        return found
+
+article_card_store = ArticleCardStore()
@@ -1,7 +1,9 @@
 from fastapi import HTTPException, status, Response, Request
 from fastapi.responses import JSONResponse
 from datetime import datetime,timezone
-from app.db.mongo import mongo_db
+import asyncio
+from pymongo.errors import DuplicateKeyError
+from app.db.mongo import mongo_db, async_mongo_db
 from app.db.redis_cache import redis_cache
 from app.utils.security_utils import security_utils
 from app.utils.email_utils import email_utils
@@ -15,34 +17,40 @@ class AuthService:
             cls._instance = super(AuthService, cls).__new__(cls)
             cls._instance.user_collection = mongo_db.get_collection("users")
             cls._instance.session_collection = mongo_db.get_collection("sessions")
+            cls._instance.async_user_collection = async_mongo_db.get_collection("users")
             cls.redis_cache = redis_cache
         return cls._instance
 
-    def signup(self, username: str, email: str, password: str) -> JSONResponse:
-        if self.user_collection.find_one({"email": email}):
+    async def signup(self, username: str, email: str, password: str) -> JSONResponse:
+        if await self.async_user_collection.find_one({"email": email}):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
 
-        hashed_password = security_utils.hash_password(password)
-        self.user_collection.insert_one({
-            "username": username,
-            "email": email,
-            "hashed_password": hashed_password,
-            "verified": False
-        })
+        # bcrypt and SMTP are blocking, so they run off the event loop
+        hashed_password = await asyncio.to_thread(security_utils.hash_password, password)
+        try:
+            await self.async_user_collection.insert_one({
+                "username": username,
+                "email": email,
+                "hashed_password": hashed_password,
+                "verified": False
+            })
+        except DuplicateKeyError:
+            # Concurrent signup for the same email; the unique index on users.email decides the winner
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
 
-        email_utils.send_otp_email(email)
+        await asyncio.to_thread(email_utils.send_otp_email, email)
 
         return JSONResponse(content={"message": "User registered successfully. Please verify your email."},
                             status_code=status.HTTP_201_CREATED)
 
-    def login(self, email: str, password: str, response: Response) -> JSONResponse:
-        user = self.user_collection.find_one({"email": email})
-        if not user or not security_utils.verify_password(password, user["hashed_password"]):
+    async def login(self, email: str, password: str, response: Response) -> JSONResponse:
+        user = await self.async_user_collection.find_one({"email": email})
+        if not user or not await asyncio.to_thread(security_utils.verify_password, password, user["hashed_password"]):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
         if not user.get("verified", False):
             try:
-                email_utils.send_otp_email(email)
+                await asyncio.to_thread(email_utils.send_otp_email, email)
                 return JSONResponse(
                     content={"message": "User not verified. OTP sent to email for verification."},
                     status_code=status.HTTP_401_UNAUTHORIZED
@@ -74,7 +82,7 @@ class AuthService:
         security_utils._set_auth_cookies(response, new_access_token, new_refresh_token)
         return response, new_access_token
     
-    def get_current_user(self, request: Request, response: Response) -> JSONResponse:
+    async def get_current_user(self, request: Request, response: Response) -> JSONResponse:
         access_token = request.cookies.get("access_token")
         payload = security_utils.decode_access_token(access_token)
 
@@ -93,7 +101,7 @@ class AuthService:
         redis_key = f"user:{email}"  
         redis_interest_key = f"user:{email}:interest"
         
-        cached_user = (self.redis_cache.get_cache(redis_key)or {}).get("data")
+        cached_user = (await self.redis_cache.get_cache_async(redis_key)or {}).get("data")
         # if cached_user:
         #     self.redis_cache.set_cache(redis_key, 3600)
         #     user_interest = self.redis_cache.get_cache(redis_interest_key)
@@ -106,7 +114,7 @@ class AuthService:
         #             redis_cache.set_cache(redis_interest_key, user_interest, expiry=3600)
         
         if not cached_user:
-            user = self.user_collection.find_one({"email": email}, {"_id": 1,"hashed_password": 0})
+            user = await self.async_user_collection.find_one({"email": email}, {"_id": 1,"hashed_password": 0})
             if not user:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -116,10 +124,12 @@ class AuthService:
                 "email": user['email']
             }
             
-            self.redis_cache.set_cache(redis_key, cached_user, expiry=21600)
+            # User and interest entries go out in one pipelined write
+            cache_entries = [(redis_key, cached_user, 21600)]
             user_interest = user.get("interests")
             if user_interest:
-                redis_cache.set_cache(redis_interest_key, user_interest, expiry=3600)
+                cache_entries.append((redis_interest_key, user_interest, 3600))
+            await self.redis_cache.set_many_async(cache_entries)
             
         response = JSONResponse(content={"message": "User authenticated", "user": cached_user})
         return response
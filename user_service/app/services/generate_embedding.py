@@ -1,14 +1,52 @@
 import numpy as np
 import json
+import threading
+import redis
+from typing import Dict, List, NamedTuple
 # from sentence_transformers import SentenceTransformer
 # from sklearn.decomposition import PCA
 from app.db.mongo import mongo_db
 from app.db.redis_cache import redis_cache
+from app.config.logger_config import logger
+from app.config.config import EMBEDDING_VERSION_POLL_SECONDS
 from pymongo.collection import Collection
 from pymongo.database import Database
 
 
+VERSION_KEY = "category_embeddings:version"
+DATA_KEY_PREFIX = "category_embeddings:v"
+UPDATE_CHANNEL = "category_embeddings:updates"
+PREVIOUS_VERSION_TTL_SECONDS = 3600
+
+# Bumps the version, stores that version's data and announces it in one step,
+# so no replica can see a version number before its data exists.
+PUBLISH_VERSION = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('SET', KEYS[2] .. version, ARGV[1])
+if version > 1 then
+    redis.call('EXPIRE', KEYS[2] .. (version - 1), ARGV[2])
+end
+redis.call('PUBLISH', KEYS[3], version)
+return version
+"""
+
+class EmbeddingSnapshot(NamedTuple):
+    version: int
+    embeddings: Dict[str, List[float]]
+    topic_index: Dict[str, int]
+    matrix: np.ndarray
+    mean_vector: np.ndarray
+
+
 class CategoryEmbeddingService:
+    """Category embeddings as an immutable, versioned snapshot.
+
+    Readers grab ``self.snapshot`` once and never touch Redis. A watcher
+    thread listens on ``UPDATE_CHANNEL`` (and re-checks ``VERSION_KEY`` every
+    ``EMBEDDING_VERSION_POLL_SECONDS`` in case a message was missed) and swaps
+    in a new snapshot with a single reference assignment.
+    """
+
     def __init__(self, n_components=14):
         self.categories = [
             "Gaming", "Finance", "Business", "Healthcare", "Science", "Education", "Psychology",
@@ -17,7 +55,9 @@ class CategoryEmbeddingService:
         
         # self.model = SentenceTransformer(model_name)
         self.n_components = n_components
-        self.category_embedding_dict = {}
+        self.snapshot = self._build_snapshot(0, {})
+        self.stop_event = threading.Event()
+        self.watcher_thread = None
 
         if isinstance(mongo_db.db, Database):
             self.collection: Collection = mongo_db.get_collection("category_embeddings")
@@ -35,21 +75,77 @@ class CategoryEmbeddingService:
     #     self.category_embedding_dict = {self.categories[i]: reduced_embeddings[i].tolist() for i in range(len(self.categories))}
 
     def _load_embeddings(self):
-        cached_data = (redis_cache.get_cache("category_embeddings")or {}).get("data")
+        version = self._current_version()
+        if version and self._load_version(version):
+            return
+        self._fetch_from_mongo()
 
-        if cached_data:
-            self.category_embedding_dict = cached_data
+    def _build_snapshot(self, version: int, embeddings: Dict[str, List[float]]) -> EmbeddingSnapshot:
+        """Packs the embeddings into one contiguous float32 matrix with a topic -> row index."""
+        topics = list(embeddings)
+        if topics:
+            matrix = np.ascontiguousarray([embeddings[topic] for topic in topics], dtype=np.float32)
+            mean_vector = matrix.mean(axis=0)
         else:
-            self._fetch_from_mongo()
+            matrix = np.zeros((0, self.n_components), dtype=np.float32)
+            mean_vector = np.zeros(self.n_components, dtype=np.float32)
+        return EmbeddingSnapshot(
+            version=version,
+            embeddings=embeddings,
+            topic_index={topic: row for row, topic in enumerate(topics)},
+            matrix=matrix,
+            mean_vector=mean_vector
+        )
+
+    def _swap(self, version: int, embeddings: Dict[str, List[float]]):
+        self.snapshot = self._build_snapshot(version, embeddings)
+        logger.info(f"Category embeddings switched to version {version} ({len(embeddings)} categories)")
+
+    def _current_version(self) -> int:
+        if not redis_cache.client:
+            return 0
+        try:
+            return int(redis_cache.client.get(VERSION_KEY) or 0)
+        except (redis.RedisError, ValueError) as e:
+            logger.error(f"Error reading category embedding version: {e}")
+            return 0
+
+    def _load_version(self, version: int) -> bool:
+        try:
+            data = redis_cache.client.get(f"{DATA_KEY_PREFIX}{version}")
+        except redis.RedisError as e:
+            logger.error(f"Error loading category embeddings v{version}: {e}")
+            return False
+        if not data:
+            logger.warning(f"Category embeddings v{version} not found in Redis")
+            return False
+        self._swap(version, json.loads(data))
+        return True
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    @property
+    def category_embedding_dict(self) -> Dict[str, List[float]]:
+        return self.snapshot.embeddings
+
+    @property
+    def topic_index(self) -> Dict[str, int]:
+        return self.snapshot.topic_index
+
+    @property
+    def dimension(self) -> int:
+        return self.snapshot.matrix.shape[1]
 
     def _fetch_from_mongo(self):
         mongo_embeddings = list(self.collection.find({}, {"_id": 0, "category": 1, "vector": 1}))
-        self.category_embedding_dict = {doc["category"]: doc["vector"] for doc in mongo_embeddings}
+        self._swap(self.snapshot.version, {doc["category"]: doc["vector"] for doc in mongo_embeddings})
 
-        redis_cache.set_cache("category_embeddings", self.category_embedding_dict)
-
-    def store_embeddings(self):
-        for category, vector in self.category_embedding_dict.items():
+    def store_embeddings(self, embeddings: Dict[str, List[float]] = None):
+        """Persists a new embedding set and rolls it out to every replica as a new version."""
+        embeddings = embeddings if embeddings is not None else self.snapshot.embeddings
+        for category, vector in embeddings.items():
             existing_record = self.collection.find_one({"category": category})
             
             category_embedding = {
@@ -62,12 +158,93 @@ class CategoryEmbeddingService:
             else:
                 self.collection.insert_one(category_embedding)
 
-        redis_cache.set_cache("category_embeddings", self.category_embedding_dict)
+        if not redis_cache.client:
+            self._swap(self.snapshot.version, embeddings)
+            return self.snapshot.version
+
+        version = redis_cache.client.eval(
+            PUBLISH_VERSION, 3, VERSION_KEY, DATA_KEY_PREFIX, UPDATE_CHANNEL,
+            json.dumps(embeddings), PREVIOUS_VERSION_TTL_SECONDS
+        )
+        self._swap(int(version), embeddings)
+        return int(version)
 
     def get_embedding(self, category):
-        return self.category_embedding_dict.get(category, None)
+        return self.snapshot.embeddings.get(category, None)
     
     def get_all_embeddings(self):
-        return self.category_embedding_dict
+        return self.snapshot.embeddings
+
+    def start_watcher(self):
+        if not redis_cache.client:
+            logger.warning("Redis unavailable, category embeddings will not hot-reload")
+            return
+        self.watcher_thread = threading.Thread(target=self._watch_versions, daemon=True)
+        self.watcher_thread.start()
+        logger.info("Category embedding version watcher started.")
+
+    def _watch_versions(self):
+        while not self.stop_event.is_set():
+            pubsub = redis_cache.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(UPDATE_CHANNEL)
+                self._refresh()
+                while not self.stop_event.is_set():
+                    message = pubsub.get_message(timeout=EMBEDDING_VERSION_POLL_SECONDS)
+                    # A message, or a quiet poll interval, both end in a version check
+                    self._refresh(int(message["data"]) if message else None)
+            except redis.RedisError as e:
+                logger.error(f"Category embedding watcher error, resubscribing: {e}")
+                self.stop_event.wait(EMBEDDING_VERSION_POLL_SECONDS)
+            finally:
+                pubsub.close()
+
+    def _refresh(self, announced_version: int = None):
+        version = announced_version or self._current_version()
+        if version > self.snapshot.version:
+            self._load_version(version)
+
+    def stop_watcher(self):
+        self.stop_event.set()
+
+    def embed_interests(self, interest_lists: List[List[Dict]]) -> np.ndarray:
+        """One row per user: the interest-weighted sum of category rows.
+
+        Users without any interests get the mean of all categories. Unknown
+        topics contribute nothing.
+        """
+        snapshot = self.snapshot
+        weights = np.zeros((len(interest_lists), len(snapshot.topic_index)), dtype=np.float32)
+        empty_rows = []
+        for row, interests in enumerate(interest_lists):
+            if not interests:
+                empty_rows.append(row)
+                continue
+            for interest in interests:
+                col = snapshot.topic_index.get(interest["topic"])
+                if col is not None:
+                    weights[row, col] += interest["weight"]
+
+        vectors = weights @ snapshot.matrix
+        if empty_rows:
+            vectors[empty_rows] = snapshot.mean_vector
+        return vectors
+
+    def embed_articles(self, categories: List[str], tags: List[List[str]], category_weight: float = 0.7) -> np.ndarray:
+        """One row per article: ``category_weight`` on its category, the rest split evenly across its tags."""
+        snapshot = self.snapshot
+        weights = np.zeros((len(categories), len(snapshot.topic_index)), dtype=np.float32)
+        for row, (category, article_tags) in enumerate(zip(categories, tags)):
+            col = snapshot.topic_index.get(category)
+            if col is not None:
+                weights[row, col] += category_weight
+
+            tag_weight = (1 - category_weight) / max(len(article_tags), 1)
+            for tag in article_tags:
+                col = snapshot.topic_index.get(tag)
+                if col is not None:
+                    weights[row, col] += tag_weight
+
+        return weights @ snapshot.matrix
         
 embedding_service = CategoryEmbeddingService()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+import redis
+from bson import ObjectId
+from app.config.logger_config import logger
+from app.config.config import INTERACTION_STATE_TTL_SECONDS
+from app.db.mongo import async_mongo_db
+from app.db.redis_cache import redis_cache
+
+RECENT_VIEW_WINDOW = timedelta(days=2)
+
+def views_key(user_id: str) -> str:
+    return f"user:{user_id}:views"
+
+def liked_key(user_id: str) -> str:
+    return f"user:{user_id}:liked"
+
+def warm_key(user_id: str) -> str:
+    return f"user:{user_id}:interactions_warm"
+
+def version_key(user_id: str) -> str:
+    return f"user:{user_id}:interactions_version"
+
+def _view_time(interaction: Dict):
+    if interaction.get("viewedAt"):
+        try:
+            viewed_at = datetime.fromisoformat(interaction["viewedAt"])
+            return viewed_at if viewed_at.tzinfo else viewed_at.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return datetime.now(timezone.utc)
+    if interaction.get("view", False):
+        return datetime.now(timezone.utc)
+    return None
+
+
+class UserInteractionState:
+    """Per-user recent views and likes kept in Redis for the recommendation filter.
+
+    ``user:{id}:views`` is a sorted set of article ids scored by view time and
+    trimmed to the 2-day window; ``user:{id}:liked`` is a set. Both are only
+    trusted while ``user:{id}:interactions_warm`` exists: that marker is set
+    when the sets are rebuilt from the interaction collection, so a user whose
+    keys expired or were never built falls back to Mongo once and is warmed.
+
+    ``user:{id}:interactions_version`` is bumped by every write before it
+    touches the sets. A rebuild only commits (DEL, rewrite, marker) if the
+    version is unchanged since before it read Mongo, so a concurrent
+    ``record_many`` can never be wiped out behind a fresh marker; the next
+    read simply warms again.
+    """
+
+    def __init__(self, ttl_seconds: int = INTERACTION_STATE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.redis_cache = redis_cache
+        self.async_interaction_collection = async_mongo_db.get_collection("interaction")
+
+    def record_many(self, interactions_by_user: Dict[str, List[Dict]]):
+        """Applies interaction events (Kafka thread) in one pipeline."""
+        if not interactions_by_user or not self.redis_cache.client:
+            return
+
+        window_start = time.time() - RECENT_VIEW_WINDOW.total_seconds()
+        pipeline = self.redis_cache.client.pipeline(transaction=False)
+        for user_id, interactions in interactions_by_user.items():
+            # Bumped first, so a rebuild committing after this point sees the change and aborts
+            pipeline.incr(version_key(user_id))
+            pipeline.expire(version_key(user_id), self.ttl_seconds)
+            views = {}
+            for interaction in interactions:
+                article_id = str(interaction.get("articleId"))
+                if not ObjectId.is_valid(article_id):
+                    continue
+                viewed_at = _view_time(interaction)
+                if viewed_at:
+                    views[article_id] = max(views.get(article_id, 0), viewed_at.timestamp())
+                if interaction.get("like") is True:
+                    pipeline.sadd(liked_key(user_id), article_id)
+                elif interaction.get("like") is False:
+                    pipeline.srem(liked_key(user_id), article_id)
+
+            if views:
+                pipeline.zadd(views_key(user_id), views, gt=True)
+            pipeline.zremrangebyscore(views_key(user_id), "-inf", window_start)
+            pipeline.expire(views_key(user_id), int(RECENT_VIEW_WINDOW.total_seconds()))
+            pipeline.expire(liked_key(user_id), self.ttl_seconds)
+
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            # Mongo stays authoritative; dropping the marker forces a rebuild on the next read
+            logger.error(f"Error updating interaction state in Redis: {e}")
+            try:
+                self.redis_cache.client.delete(*[warm_key(user_id) for user_id in interactions_by_user])
+            except redis.RedisError:
+                pass
+
+    async def recent_views(self, user_id: str, limit: int) -> List[str]:
+        """Recently viewed article ids, newest first."""
+        if not self.redis_cache.async_client:
+            return (await self._load_from_mongo(user_id, limit))[0]
+
+        window_start = time.time() - RECENT_VIEW_WINDOW.total_seconds()
+        try:
+            async with self.redis_cache.async_client.pipeline(transaction=False) as pipe:
+                pipe.exists(warm_key(user_id))
+                pipe.zrevrangebyscore(views_key(user_id), "+inf", window_start, start=0, num=limit)
+                pipe.get(version_key(user_id))
+                is_warm, views, version = await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Error reading interaction state for {user_id}: {e}")
+            return (await self._load_from_mongo(user_id, limit))[0]
+
+        if is_warm:
+            return [article_id.decode() for article_id in views]
+        return (await self._warm(user_id, version))[:limit]
+
+    async def filter_candidates(self, user_id: str, article_ids: List[str]):
+        """(recently viewed ids, liked map) for the candidates in one pipelined call, or None if Redis is unavailable or cold."""
+        if not article_ids:
+            return set(), {}
+        if not self.redis_cache.async_client:
+            return None
+
+        window_start = time.time() - RECENT_VIEW_WINDOW.total_seconds()
+        try:
+            async with self.redis_cache.async_client.pipeline(transaction=False) as pipe:
+                pipe.exists(warm_key(user_id))
+                pipe.zmscore(views_key(user_id), article_ids)
+                pipe.smismember(liked_key(user_id), article_ids)
+                is_warm, view_scores, liked_flags = await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Error reading interaction state for {user_id}: {e}")
+            return None
+        if not is_warm:
+            # Warming failed or was aborted by a concurrent write; the sets may be incomplete
+            return None
+
+        recently_viewed_ids = {
+            article_id for article_id, score in zip(article_ids, view_scores)
+            if score is not None and score >= window_start
+        }
+        liked_map = {article_id: True for article_id, liked in zip(article_ids, liked_flags) if liked}
+        return recently_viewed_ids, liked_map
+
+    async def _load_from_mongo(self, user_id: str, limit: int = 0):
+        recent_view_threshold = datetime.now(timezone.utc) - RECENT_VIEW_WINDOW
+        views_cursor = self.async_interaction_collection.find(
+            {"userId": user_id, "action.view": {"$gte": recent_view_threshold}},
+            {"_id": 0, "articleId": 1, "action.view": 1}
+        ).sort("action.view", -1).limit(limit)
+        liked_cursor = self.async_interaction_collection.find(
+            {"userId": user_id, "action.like": True},
+            {"_id": 0, "articleId": 1}
+        )
+        views, liked = await asyncio.gather(views_cursor.to_list(length=None), liked_cursor.to_list(length=None))
+        return [str(doc["articleId"]) for doc in views], views, [str(doc["articleId"]) for doc in liked]
+
+    async def _warm(self, user_id: str, version) -> List[str]:
+        """Rebuilds the sets from Mongo; ``version`` is the write version read before the Mongo query."""
+        view_ids, view_docs, liked_ids = await self._load_from_mongo(user_id)
+        views = {}
+        for article_id, doc in zip(view_ids, view_docs):
+            viewed_at = doc["action"]["view"]
+            if viewed_at.tzinfo is None:
+                viewed_at = viewed_at.replace(tzinfo=timezone.utc)
+            views[article_id] = viewed_at.timestamp()
+
+        try:
+            async with self.redis_cache.async_client.pipeline(transaction=True) as pipe:
+                await pipe.watch(version_key(user_id))
+                if await pipe.get(version_key(user_id)) != version:
+                    logger.info(f"Interaction state for {user_id} changed while warming, will retry on the next read")
+                    return view_ids
+                pipe.multi()
+                pipe.delete(views_key(user_id), liked_key(user_id))
+                if views:
+                    pipe.zadd(views_key(user_id), views)
+                    pipe.expire(views_key(user_id), int(RECENT_VIEW_WINDOW.total_seconds()))
+                if liked_ids:
+                    pipe.sadd(liked_key(user_id), *liked_ids)
+                    pipe.expire(liked_key(user_id), self.ttl_seconds)
+                pipe.set(warm_key(user_id), 1, ex=self.ttl_seconds)
+                await pipe.execute()
+            logger.info(f"Warmed interaction state for {user_id}: {len(views)} recent views, {len(liked_ids)} likes")
+        except redis.WatchError:
+            logger.info(f"Interaction state for {user_id} changed while warming, will retry on the next read")
+        except redis.RedisError as e:
+            logger.error(f"Error warming interaction state for {user_id}: {e}")
+
+        return view_ids
+
+interaction_state = UserInteractionState()
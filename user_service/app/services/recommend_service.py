@@ -1,63 +1,83 @@
-from app.db.mongo import mongo_db
-from app.db.qdrant import qdrant_db
+import asyncio
+import time
+from collections import defaultdict
+from app.db.mongo import mongo_db, async_mongo_db
+from app.db.qdrant import qdrant_db, article_point_id
 from app.config.logger_config import logger
+from app.config.config import (
+    RECOMMEND_TIMEOUT_SECONDS, RECOMMEND_SEEN_EXCLUSION, RECOMMEND_SEEN_LIMIT,
+    RECOMMEND_OVERFETCH_BUDGET_SECONDS, RECOMMEND_MAX_PAGE_SIZE
+)
 from app.services.user import user_service
+from app.services.article_cards import article_card_store, build_card
+from app.services.interaction_state import interaction_state
 from bson import ObjectId
 from datetime import datetime, timedelta,timezone
 from pymongo import UpdateOne
+from fastapi import HTTPException
 
 class RecommendService:
     def __init__(self):
-        self.content_collection = mongo_db.get_collection("content")
         self.interaction_collection = mongo_db.get_collection("interaction")
+        self.async_interaction_collection = async_mongo_db.get_collection("interaction")
 
-    def get_recommendations(self, email: str, top_k: int = 30):
-        user_embedding = user_service.compute_user_embedding(email)
+    async def get_recommendations(self, email: str, top_k: int = 30):
+        try:
+            return await asyncio.wait_for(self._get_recommendations(email, top_k), timeout=RECOMMEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Recommendations for {email} exceeded the {RECOMMEND_TIMEOUT_SECONDS}s deadline")
+            raise HTTPException(status_code=504, detail="Recommendation request timed out")
+
+    async def _get_recommendations(self, email: str, top_k: int):
+        # User id and interests come from one MGET; the Mongo fallback for interests and the seen ids run concurrently
+        user_id, cached_interests = await user_service.get_user_context(email)
+        user_interests, seen_ids = await asyncio.gather(
+            user_service.get_user_interests(email, cached_interests),
+            self.get_recent_seen_ids(user_id)
+        )
+        user_embedding = user_service.embed_user(email, user_interests)
         if not user_embedding:
             logger.warning(f"No embedding found for user: {email}")
             return {"message": "No embedding found for user.", "recommendations": []}
 
-        search_results = qdrant_db.search_vector("content_embeddings", user_embedding, top_k)
+        search_results = await self._search_unseen(user_embedding, top_k, seen_ids)
 
-        matched_ids = []
-        article_ids = []
         qdrant_score_map = {}
+        cards = {}
 
         for result in search_results:
-            try:
-                mongo_id  = result.payload.get("mongo_id")
-                if mongo_id:
-                    article_ids.append(mongo_id)
-                    matched_ids.append(ObjectId(mongo_id))
-                    qdrant_score_map[mongo_id] = result.score
-            except Exception as e:
-                logger.warning(f"Invalid ObjectId from Qdrant result: {result.id} — {e}")
-
-        if not matched_ids:
+            payload = result.payload or {}
+            mongo_id = payload.get("mongo_id")
+            if not mongo_id:
+                continue
+            qdrant_score_map[mongo_id] = result.score
+            if payload.get("title"):
+                cards[mongo_id] = build_card(payload)
+
+        if not qdrant_score_map:
             return {"message": "No matched content found.", "recommendations": []}
 
-        articles = list(self.content_collection.find(
-            {"_id": {"$in": matched_ids}},
-            {"interactionMetrics": 0}
-        ))
-
-        user_id = user_service.get_user_id(email)
-        recently_viewed_ids,liked_map = self.batch_interaction_filter(user_id, article_ids)
+        # Cards come from the Qdrant payload; only articles indexed without one go to the card store
+        article_ids = list(qdrant_score_map)
+        missing_cards = [article_id for article_id in article_ids if article_id not in cards]
+        stored_cards, (recently_viewed_ids, liked_map) = await asyncio.gather(
+            article_card_store.get_many_async(missing_cards),
+            self.batch_interaction_filter(user_id, article_ids)
+        )
+        cards.update(stored_cards)
 
         recommended_content = []
 
-        for article in articles:
-            mongo_id = str(article["_id"])
-            if mongo_id in recently_viewed_ids:
-                continue 
-            article.update({
+        for mongo_id in article_ids:
+            if mongo_id in recently_viewed_ids or mongo_id not in cards:
+                continue
+            recommended_content.append({
                 "_id": mongo_id,
-                "score": qdrant_score_map.get(mongo_id, 0.0),
+                **cards[mongo_id],
+                "score": qdrant_score_map[mongo_id],
                 "liked": liked_map.get(mongo_id, False)
             })
 
-            recommended_content.append(article)
-
         recommended_content.sort(key=lambda x: x["score"], reverse=True)
 
         logger.info(f"Retrieved {len(recommended_content)} recommendations for user: {email}")
@@ -66,12 +86,50 @@ class RecommendService:
             "recommendations": recommended_content
         }
         
-    def batch_interaction_filter(self,user_id: str, article_ids: list):
+    async def get_recent_seen_ids(self, user_id: str, limit: int = RECOMMEND_SEEN_LIMIT) -> list:
+        """Most recently viewed article ids inside the 2-day exclusion window, newest first."""
+        return await interaction_state.recent_views(user_id, limit)
+
+    async def _search_unseen(self, user_embedding: list, top_k: int, seen_ids: list):
+        """Nearest articles the user has not seen recently.
+
+        In ``filter`` mode the seen set is excluded inside Qdrant, so the first
+        page normally fills ``top_k``. Otherwise, or when older views slip past
+        the capped seen set, further pages are fetched with a growing page size
+        until ``top_k`` survive or the over-fetch budget runs out.
+        """
+        seen = set(seen_ids)
+        exclude_ids = [article_point_id(article_id) for article_id in seen_ids] if RECOMMEND_SEEN_EXCLUSION == "filter" else None
+        deadline = time.monotonic() + RECOMMEND_OVERFETCH_BUDGET_SECONDS
+
+        survivors = []
+        offset = 0
+        limit = top_k
+        while len(survivors) < top_k:
+            results = await qdrant_db.search_vector_async(
+                "content_embeddings", user_embedding, limit, offset=offset, exclude_ids=exclude_ids
+            )
+            offset += len(results)
+            survivors.extend(result for result in results if (result.payload or {}).get("mongo_id") not in seen)
+            if len(results) < limit or time.monotonic() >= deadline:
+                break
+            limit = min(limit * 2, RECOMMEND_MAX_PAGE_SIZE)
+
+        return survivors[:top_k]
+
+    async def batch_interaction_filter(self,user_id: str, article_ids: list):
+        # Redis answers for just the candidates; Mongo is only asked when Redis is unavailable
+        filtered = await interaction_state.filter_candidates(user_id, article_ids)
+        if filtered is not None:
+            return filtered
+        return await self._mongo_interaction_filter(user_id, article_ids)
+
+    async def _mongo_interaction_filter(self, user_id: str, article_ids: list):
         recently_viewed_ids = set()
         liked_map = {}
         recent_view_threshold = datetime.now(timezone.utc) - timedelta(days=2)
         
-        interactions = self.interaction_collection.find({
+        interactions = self.async_interaction_collection.find({
             "userId": user_id,
             "articleId": {"$in": article_ids},
             "$or": [
@@ -80,7 +138,7 @@ class RecommendService:
             ]
         })
 
-        for interaction in interactions:
+        async for interaction in interactions:
             article_id = str(interaction["articleId"])
             action = interaction.get("action", {})
 
@@ -98,61 +156,81 @@ class RecommendService:
     
     def process_user_interaction_update(self, event):
         try:
+            self.process_user_interaction_updates([event])
+        except Exception as e:
+            logger.error(f"Error processing user interaction update: {e}", exc_info=True)
+
+    def process_user_interaction_updates(self, events):
+        bulk_updates = []
+        interactions_by_user = defaultdict(list)
+
+        user_ids = user_service.get_user_ids(list({event.get("email") for event in events if event.get("email")}))
+
+        for event in events:
             interactions = event.get("interactions", [])
             email = event.get("email")
 
             if not email or not interactions:
                 logger.warning("Invalid interaction update event: missing email or interactions")
-                return
+                continue
+
+            user_id = user_ids.get(email)
+            if not user_id:
+                logger.warning(f"Skipping interaction update for {email}: user id not cached")
+                continue
 
             logger.info(f"Processing {len(interactions)} user interaction updates for {email}")
-            user_id = user_service.get_user_id(email)
+            bulk_updates.extend(self._interaction_operations(user_id, interactions))
+            interactions_by_user[user_id].extend(interactions)
 
-            bulk_updates = []
-            article_ids = []
+        # Write failures propagate so the consumer does not commit the batch
+        if bulk_updates:
+            result = self.interaction_collection.bulk_write(bulk_updates, ordered=False)
+            logger.info(f"User interaction bulk updated: Matched={result.matched_count}, Upserts={result.upserted_count}")
+            interaction_state.record_many(interactions_by_user)
 
-            for interaction in interactions:
-                article_id = ObjectId(interaction.get("articleId"))
+    def _interaction_operations(self, user_id: str, interactions: list):
+        bulk_updates = []
 
-                article_ids.append(article_id)
-
-                update_fields = {}
-                inc_fields = {}
+        for interaction in interactions:
+            try:
+                article_id = ObjectId(interaction.get("articleId"))
+            except Exception:
+                logger.warning(f"Skipping interaction with invalid articleId: {interaction.get('articleId')}")
+                continue
 
-                if interaction.get("like") is not None:
-                    update_fields["action.like"] = interaction["like"]
+            update_fields = {}
+            inc_fields = {}
 
-                if interaction.get("share"):
-                    inc_fields["action.share"] = interaction["share"]
+            if interaction.get("like") is not None:
+                update_fields["action.like"] = interaction["like"]
 
-                if interaction.get("viewedAt"):
-                    try:
-                        update_fields["action.view"] = datetime.fromisoformat(interaction["viewedAt"])
-                    except ValueError as ve:
-                        logger.warning(f"Invalid date format for viewedAt: {interaction['viewedAt']}. Error: {ve}")
-                        update_fields["action.view"] = datetime.now(timezone.utc)
+            if interaction.get("share"):
+                inc_fields["action.share"] = interaction["share"]
 
-                elif interaction.get("view", False):
+            if interaction.get("viewedAt"):
+                try:
+                    update_fields["action.view"] = datetime.fromisoformat(interaction["viewedAt"])
+                except ValueError as ve:
+                    logger.warning(f"Invalid date format for viewedAt: {interaction['viewedAt']}. Error: {ve}")
                     update_fields["action.view"] = datetime.now(timezone.utc)
 
+            elif interaction.get("view", False):
+                update_fields["action.view"] = datetime.now(timezone.utc)
 
-                update_query = {
-                    "$setOnInsert": {"userId": user_id, "articleId": str(article_id)},
-                    "$set": update_fields,
-                    "$inc": inc_fields
-                }
 
-                bulk_updates.append(UpdateOne(
-                    {"userId": user_id, "articleId": str(article_id)},
-                    update_query,
-                    upsert=True
-                ))
+            update_query = {
+                "$setOnInsert": {"userId": user_id, "articleId": str(article_id)},
+                "$set": update_fields,
+                "$inc": inc_fields
+            }
 
-            if bulk_updates:
-                result = self.interaction_collection.bulk_write(bulk_updates)
-                logger.info(f"User interaction bulk updated: Matched={result.matched_count}, Upserts={result.upserted_count}")
+            bulk_updates.append(UpdateOne(
+                {"userId": user_id, "articleId": str(article_id)},
+                update_query,
+                upsert=True
+            ))
 
-        except Exception as e:
-            logger.error(f"Error processing user interaction update: {e}", exc_info=True)
+        return bulk_updates
     
 recommend_service = RecommendService()
\ No newline at end of file
@@ -1,71 +1,95 @@
 from fastapi import APIRouter, HTTPException
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+import threading
 from bson import ObjectId
-from typing import List,Dict
-import numpy as np
+from typing import List,Dict,Optional,Tuple
 from app.config.logger_config import logger
-from app.db.mongo import mongo_db
+from app.db.mongo import mongo_db, async_mongo_db
 from app.db.redis_cache import redis_cache
 from app.models.mongo_model import User, Interest
-from app.services.generate_embedding import CategoryEmbeddingService
+from app.services.generate_embedding import embedding_service
+from app.config.config import USER_VECTOR_CACHE_SIZE
 
 router = APIRouter()
 
 class UserInterestService:
     def __init__(self):
         self.user_collection = mongo_db.get_collection("users")
-        self.category_embedding_service = CategoryEmbeddingService()
+        self.async_user_collection = async_mongo_db.get_collection("users")
+        self.category_embedding_service = embedding_service
+        # email -> (embedding version, interests fingerprint, vector)
+        self.user_vectors = OrderedDict()
+        self.user_vector_lock = threading.Lock()
         self.redis_cache = redis_cache
 
-    def log_interest(self, email: str, interests: List[Interest]):
-        user_data = self.user_collection.find_one({"email": email})
+    async def log_interest(self, email: str, interests: List[Interest]):
+        user_data = await self.async_user_collection.find_one({"email": email})
 
         if user_data:
-            self.user_collection.update_one(
+            await self.async_user_collection.update_one(
                 {"email": email},
                 {"$set": {"interests": [interest.dict() for interest in interests]}}
             )
         else:
             new_user = User(email=email, interests=interests)
-            self.user_collection.insert_one(new_user.dict(by_alias=True))
+            await self.async_user_collection.insert_one(new_user.dict(by_alias=True))
 
         logger.info(f"Logged interest for user: {email}")
 
     
-    def compute_user_embedding(self, email: str) -> List[float]:
+    async def compute_user_embedding(self, email: str) -> List[float]:
+        return self.embed_user(email, await self.get_user_interests(email))
+
+    def embed_user(self, email: str, user_interests: List[Dict]) -> List[float]:
+        """Cached user vector, recomputed when the interests or the embedding version change."""
+        version = self.category_embedding_service.version
+        fingerprint = tuple((interest["topic"], interest["weight"]) for interest in user_interests)
+
+        with self.user_vector_lock:
+            cached = self.user_vectors.get(email)
+            if cached and cached[0] == version and cached[1] == fingerprint:
+                self.user_vectors.move_to_end(email)
+                return cached[2]
+
+        vector = self.embed_interests(user_interests)
+        with self.user_vector_lock:
+            self.user_vectors[email] = (version, fingerprint, vector)
+            self.user_vectors.move_to_end(email)
+            while len(self.user_vectors) > USER_VECTOR_CACHE_SIZE:
+                self.user_vectors.popitem(last=False)
+        return vector
+
+    async def get_user_context(self, email: str) -> Tuple[str, Optional[List[Dict]]]:
+        """User id and cached interests in one MGET; interests are None on a cache miss."""
+        redis_key = f"user:{email}"
         redis_interest_key = f"user:{email}:interest"
-        cached_interest = (self.redis_cache.get_cache(redis_interest_key) or {}).get("data")
-    
-        if cached_interest:
-            user_interests = cached_interest
-        else:
-            user_data = self.user_collection.find_one({"email": email}, {"interests": 1})
-            if not user_data:
-                raise HTTPException(status_code=404, detail="User not found")
-            user_interests = user_data.get("interests", [])
-            self.redis_cache.set_cache(redis_interest_key, user_interests, expiry=3600)
-        
-        category_embeddings = self.category_embedding_service.get_all_embeddings()
-        if not category_embeddings:
-            raise HTTPException(status_code=500, detail="Category embeddings not available")
+        cached = await self.redis_cache.mget_cache_async([redis_key, redis_interest_key])
 
-        embedding_dim = len(next(iter(category_embeddings.values())))
-        final_embedding = np.zeros(embedding_dim)
+        cached_user = (cached[redis_key] or {}).get("data")
+        if not cached_user:
+            raise HTTPException(status_code=401, detail="User not Authorized")
+        return cached_user["userId"], (cached[redis_interest_key] or {}).get("data")
 
-        if not user_interests:
-            num_categories = len(category_embeddings)
-            for emb in category_embeddings.values():
-                final_embedding += np.array(emb)
-            final_embedding /= num_categories
-            return final_embedding.tolist()
+    async def get_user_interests(self, email: str, cached_interest: Optional[List[Dict]] = None) -> List[Dict]:
+        redis_interest_key = f"user:{email}:interest"
+        if cached_interest is None:
+            cached_interest = (await self.redis_cache.get_cache_async(redis_interest_key) or {}).get("data")
+
+        if cached_interest:
+            return cached_interest
 
-        for interest in user_interests:
-            category = interest["topic"]
-            weight = interest["weight"]
-            if category in category_embeddings:
-                final_embedding += np.array(category_embeddings[category]) * weight
+        user_data = await self.async_user_collection.find_one({"email": email}, {"interests": 1})
+        if not user_data:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_interests = user_data.get("interests", [])
+        await self.redis_cache.set_cache_async(redis_interest_key, user_interests, expiry=3600)
+        return user_interests
 
-        return final_embedding.tolist()
+    def embed_interests(self, user_interests: List[Dict]) -> List[float]:
+        if not self.category_embedding_service.topic_index:
+            raise HTTPException(status_code=500, detail="Category embeddings not available")
+
+        return self.category_embedding_service.embed_interests([user_interests])[0].tolist()
     
     def process_interest_update(self, event: Dict):
         try:
@@ -75,53 +99,85 @@ class UserInterestService:
             if not email or not new_interest:
                 logger.info("Invalid event data: Missing userId or userInterest.")
                 raise ValueError("Invalid event data")
-                
-            redis_interest_key = f"user:{email}:interest"
-            
-            cached_interest = (redis_cache.get_cache(redis_interest_key)or {}).get("data")
-
-            if cached_interest:
-                previous_interest = cached_interest
-            else:
-                user_data = self.user_collection.find_one({"email": email}, {"interests": 1})
-                previous_interest = user_data.get("interests", []) if user_data else []
-
-            if not isinstance(previous_interest, list):
-                previous_interest = []
-            prev_interest_dict = {
-                item["topic"]: item["weight"]
-                for item in previous_interest
-                if isinstance(item, dict) and "topic" in item and "weight" in item
-            }
-            
-            new_interest_dict = {
-                item["topic"]: item["weight"]
-                for item in new_interest
-                if isinstance(item, dict) and "topic" in item and "weight" in item
-            }
-            
-            final_interest = defaultdict(float)
-            weight_previous = 0.7
-            weight_new = 0.3
-            
-            for topic, wt in prev_interest_dict.items():
-                final_interest[topic] += wt * weight_previous
-
-            for topic, wt in new_interest_dict.items():
-                final_interest[topic] += wt * weight_new
-
-            total_weight = sum(final_interest.values())
-            if total_weight > 0:
-                for topic in final_interest:
-                    final_interest[topic] /= total_weight
-
-            updated_interest = [{"topic": topic, "weight": weight} for topic, weight in final_interest.items()]
-            
-            redis_cache.set_cache(redis_interest_key, updated_interest, expiry=3600)
-            logger.info(f"User {email} interest updated successfully in Redis.")
+
+            self.process_interest_updates([event])
 
         except Exception as e:
             logger.error(f"Error processing interest update: {e}", exc_info=True)
+
+    def process_interest_updates(self, events: List[Dict]):
+        # One MGET and one pipelined write for the whole batch, folding each user's events in order
+        updates_by_email = defaultdict(list)
+        for event in events:
+            email = event.get("email")
+            new_interest = event.get("updatedInterest", [])
+            if not email or not new_interest:
+                logger.info("Invalid event data: Missing userId or userInterest.")
+                continue
+            updates_by_email[email].append(new_interest)
+        if not updates_by_email:
+            return
+
+        cached = redis_cache.mget_cache([f"user:{email}:interest" for email in updates_by_email])
+        cache_entries = []
+        # Errors stay per user: a replayed batch would blend interests already written for the others twice
+        for email, new_interests in updates_by_email.items():
+            redis_interest_key = f"user:{email}:interest"
+            try:
+                updated_interest = self._apply_interest_updates(email, cached[redis_interest_key], new_interests)
+                cache_entries.append((redis_interest_key, updated_interest, 3600))
+            except Exception as e:
+                logger.error(f"Error processing interest updates for {email}: {e}", exc_info=True)
+
+        if redis_cache.set_many(cache_entries):
+            logger.info(f"Interests updated in Redis for {len(cache_entries)} users ({sum(len(u) for u in updates_by_email.values())} updates).")
+
+    def _apply_interest_updates(self, email: str, cached_entry: Optional[Dict], new_interests: List[List[Dict]]) -> List[Dict]:
+        cached_interest = (cached_entry or {}).get("data")
+
+        if cached_interest:
+            previous_interest = cached_interest
+        else:
+            user_data = self.user_collection.find_one({"email": email}, {"interests": 1})
+            previous_interest = user_data.get("interests", []) if user_data else []
+
+        if not isinstance(previous_interest, list):
+            previous_interest = []
+
+        updated_interest = previous_interest
+        for new_interest in new_interests:
+            updated_interest = self._blend_interest(updated_interest, new_interest)
+        return updated_interest
+
+    def _blend_interest(self, previous_interest: List[Dict], new_interest: List[Dict]) -> List[Dict]:
+        prev_interest_dict = {
+            item["topic"]: item["weight"]
+            for item in previous_interest
+            if isinstance(item, dict) and "topic" in item and "weight" in item
+        }
+        
+        new_interest_dict = {
+            item["topic"]: item["weight"]
+            for item in new_interest
+            if isinstance(item, dict) and "topic" in item and "weight" in item
+        }
+        
+        final_interest = defaultdict(float)
+        weight_previous = 0.7
+        weight_new = 0.3
+        
+        for topic, wt in prev_interest_dict.items():
+            final_interest[topic] += wt * weight_previous
+
+        for topic, wt in new_interest_dict.items():
+            final_interest[topic] += wt * weight_new
+
+        total_weight = sum(final_interest.values())
+        if total_weight > 0:
+            for topic in final_interest:
+                final_interest[topic] /= total_weight
+
+        return [{"topic": topic, "weight": weight} for topic, weight in final_interest.items()]
     
     def get_user_id(self,email: str):
         redis_key = f"user:{email}"
@@ -131,5 +187,22 @@ class UserInterestService:
             return cached_user["userId"]
         
         raise HTTPException(status_code=401, detail="User not Authorized")
+
+    def get_user_ids(self, emails: List[str]) -> Dict[str, str]:
+        """Cached user ids for ``emails`` in one MGET; emails without a cached user are left out."""
+        cached = self.redis_cache.mget_cache([f"user:{email}" for email in emails])
+        user_ids = {}
+        for email in emails:
+            cached_user = (cached[f"user:{email}"] or {}).get("data")
+            if cached_user:
+                user_ids[email] = cached_user["userId"]
+        return user_ids
+
+    async def get_user_id_async(self, email: str):
+        cached_user = (await self.redis_cache.get_cache_async(f"user:{email}") or {}).get("data")
+        if cached_user:
+            return cached_user["userId"]
+
+        raise HTTPException(status_code=401, detail="User not Authorized")
     
 user_service = UserInterestService()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+from typing import Dict, List
+from app.config.logger_config import logger
+from app.services.generate_embedding import embedding_service
+
+# Usage (from user_service/):
+#   python -m app.tools.category_embeddings status
+#   python -m app.tools.category_embeddings publish --file embeddings.json
+#   python -m app.tools.category_embeddings publish --from-mongo
+
+def load_file(path: str) -> Dict[str, List[float]]:
+    """Reads ``{"category": [floats...]}``."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_mongo() -> Dict[str, List[float]]:
+    return {
+        doc["category"]: doc["vector"]
+        for doc in embedding_service.collection.find({}, {"_id": 0, "category": 1, "vector": 1})
+    }
+
+def validate(embeddings: Dict[str, List[float]]) -> List[str]:
+    problems = []
+    if not embeddings:
+        return ["no categories"]
+
+    dimensions = {len(vector) for vector in embeddings.values()}
+    if len(dimensions) > 1:
+        problems.append(f"mixed vector dimensions: {sorted(dimensions)}")
+    missing = sorted(set(embedding_service.categories) - set(embeddings))
+    if missing:
+        problems.append(f"missing categories: {missing}")
+    for category, vector in embeddings.items():
+        if not all(isinstance(value, (int, float)) for value in vector):
+            problems.append(f"non-numeric values in '{category}'")
+    return problems
+
+def run_status():
+    snapshot = embedding_service.snapshot
+    logger.info(
+        f"Published version: {embedding_service._current_version()}, "
+        f"loaded version: {snapshot.version} ({len(snapshot.embeddings)} categories, dimension {embedding_service.dimension}), "
+        f"MongoDB categories: {embedding_service.collection.count_documents({})}"
+    )
+
+def run_publish(embeddings: Dict[str, List[float]], dry_run: bool) -> bool:
+    problems = validate(embeddings)
+    if problems:
+        logger.error(f"Refusing to publish category embeddings: {'; '.join(problems)}")
+        return False
+    if dry_run:
+        logger.info(f"Dry run: {len(embeddings)} categories would be published")
+        return True
+
+    version = embedding_service.store_embeddings(embeddings)
+    logger.info(f"Published category embeddings version {version} ({len(embeddings)} categories)")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Category embedding version management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("status", help="Show the published, loaded and stored embedding sets")
+    publish_parser = subparsers.add_parser("publish", help="Store an embedding set and roll it out to every replica as a new version")
+    source = publish_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON object mapping category -> vector")
+    source.add_argument("--from-mongo", action="store_true", help="Republish the vectors currently in MongoDB")
+    publish_parser.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        run_status()
+    elif args.command == "publish":
+        embeddings = load_file(args.file) if args.file else load_mongo()
+        sys.exit(0 if run_publish(embeddings, args.dry_run) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from app.config.logger_config import logger
+from app.db.mongo import mongo_db
+from app.db.indexes import INDEXES, ensure_indexes
+
+# Usage (from user_service/):
+#   python -m app.tools.mongo_indexes check
+#   python -m app.tools.mongo_indexes apply
+#   python -m app.tools.mongo_indexes normalize --dry-run
+
+def sample_queries(db):
+    """The service's hot queries, parameterized with real ids so explain() is meaningful."""
+    user = db["users"].find_one({}, {"email": 1}) or {}
+    interaction = db["interaction"].find_one({}, {"userId": 1, "articleId": 1}) or {}
+    user_id = interaction.get("userId", "")
+    article_id = str(interaction.get("articleId", ""))
+    recent_view_threshold = datetime.now(timezone.utc) - timedelta(days=2)
+
+    return [
+        ("login lookup", "users", db["users"].find({"email": user.get("email", "")})),
+        ("interaction upsert key", "interaction", db["interaction"].find({"userId": user_id, "articleId": article_id})),
+        ("candidate filter", "interaction", db["interaction"].find({
+            "userId": user_id,
+            "articleId": {"$in": [article_id]},
+            "$or": [{"action.like": True}, {"action.view": {"$gte": recent_view_threshold}}]
+        })),
+        ("recent views", "interaction", db["interaction"].find(
+            {"userId": user_id, "action.view": {"$gte": recent_view_threshold}}
+        ).sort("action.view", -1).limit(500)),
+        ("liked articles", "interaction", db["interaction"].find({"userId": user_id, "action.like": True})),
+    ]
+
+def _plan_stages(plan):
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages)
+
+def run_check(db) -> bool:
+    healthy = True
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        expected = {index.document["name"] for index in indexes}
+
+        missing = sorted(expected - set(existing))
+        unregistered = sorted(set(existing) - expected - {"_id_"})
+        usage = {stat["name"]: stat["accesses"]["ops"] for stat in collection.aggregate([{"$indexStats": {}}])}
+        unused = sorted(name for name in expected & set(existing) if usage.get(name, 0) == 0)
+
+        logger.info(f"[{collection_name}] documents={collection.estimated_document_count()} indexes={sorted(existing)}")
+        if missing:
+            healthy = False
+            logger.warning(f"[{collection_name}] missing indexes: {missing}")
+        if unregistered:
+            logger.warning(f"[{collection_name}] indexes not in the registry: {unregistered} (ops: {[usage.get(name, 0) for name in unregistered]})")
+        if unused:
+            logger.info(f"[{collection_name}] no recorded use since last restart: {unused}")
+
+    for label, collection_name, cursor in sample_queries(db):
+        explain = cursor.explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        winning_plan = winning_plan.get("queryPlan", winning_plan)
+        stats = explain.get("executionStats", {})
+        plan = _plan_stages(winning_plan)
+        if "COLLSCAN" in plan:
+            healthy = False
+        logger.info(
+            f"[{collection_name}] {label:<24}: {plan} "
+            f"(keys examined={stats.get('totalKeysExamined')}, docs examined={stats.get('totalDocsExamined')}, "
+            f"returned={stats.get('nReturned')})"
+        )
+
+    logger.info(f"Index check: {'OK' if healthy else 'ATTENTION NEEDED'}")
+    return healthy
+
+def run_normalize(db, dry_run: bool) -> int:
+    """Rewrites ObjectId articleIds as strings, merging into an existing string-keyed document if there is one."""
+    collection = db["interaction"]
+    legacy = list(collection.find({"articleId": {"$type": "objectId"}}))
+    logger.info(f"Found {len(legacy)} interactions with ObjectId articleId")
+    if dry_run:
+        return len(legacy)
+
+    merged = 0
+    for doc in legacy:
+        article_id = str(doc["articleId"])
+        try:
+            collection.update_one({"_id": doc["_id"]}, {"$set": {"articleId": article_id}})
+        except DuplicateKeyError:
+            action = doc.get("action", {})
+            update = {"$inc": {"action.share": action.get("share", 0)}}
+            if action.get("view"):
+                update["$max"] = {"action.view": action["view"]}
+            if action.get("like") is not None:
+                update["$max"] = {**update.get("$max", {}), "action.like": action["like"]}
+            collection.update_one({"userId": doc["userId"], "articleId": article_id}, update)
+            collection.delete_one({"_id": doc["_id"]})
+            merged += 1
+
+    logger.info(f"Normalized {len(legacy)} interactions ({merged} merged into existing documents)")
+    return len(legacy)
+
+def main():
+    parser = argparse.ArgumentParser(description="User service MongoDB index management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("check", help="Report missing/unused indexes and explain() the hot queries")
+    subparsers.add_parser("apply", help="Create any missing registry indexes")
+    normalize_parser = subparsers.add_parser("normalize", help="Store every interaction articleId as a string")
+    normalize_parser.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args()
+
+    db = mongo_db.db
+    if db is None:
+        logger.error("MongoDB not connected.")
+        sys.exit(1)
+
+    if args.command == "check":
+        sys.exit(0 if run_check(db) else 1)
+    elif args.command == "apply":
+        sys.exit(1 if ensure_indexes(db) else 0)
+    elif args.command == "normalize":
+        run_normalize(db, args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ from app.config.config import (
 from app.config.logger_config import logger
 from app.db.redis_cache import redis_cache
 from app.utils.security_utils import security_utils
-from app.db.mongo import mongo_db
+from app.db.mongo import mongo_db, async_mongo_db
 
 class EmailUtils:
     _instance = None
@@ -24,6 +24,7 @@ class EmailUtils:
             cls._instance = super(EmailUtils, cls).__new__(cls)
             cls._instance.user_collection = mongo_db.get_collection("users")
             cls._instance.session_collection = mongo_db.get_collection("sessions")
+            cls._instance.async_user_collection = async_mongo_db.get_collection("users")
         return cls._instance
 
     def _send_email(self, to_email: str, subject: str, body: str, is_html: bool = False):
@@ -51,26 +52,6 @@ class EmailUtils:
             logger.error(f"Unexpected error sending email to {to_email}: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to send email.")
 
-    def _can_request_otp(self, email: str) -> bool:
-        try:
-            otp_request_count_key = f"otp_requests:{email}"
-            last_request_key = f"otp_last_request:{email}"
-
-            request_count = redis_cache.get_value(otp_request_count_key or {})
-            if request_count and int(request_count) >= OTP_REQUEST_LIMIT:
-                logger.warning(f"OTP request limit exceeded for {email}")
-                return False
-
-            last_request = redis_cache.get_value(last_request_key or {})
-            if last_request:
-                logger.warning(f"OTP cooldown active for {email}")
-                return False
-
-            return True
-        except Exception as e:
-            logger.error(f"Error checking OTP request eligibility for {email}: {e}")
-            return False
-
     def _hash_otp(self, otp: str) -> str:
         try:
             return hashlib.sha256(otp.encode()).hexdigest()
@@ -80,22 +61,25 @@ class EmailUtils:
 
     def generate_email_otp(self, email: str) -> str:
         try:
-            if not self._can_request_otp(email):
-                raise HTTPException(status_code=429, detail="Too many OTP requests. Try again later.")
-
             otp = ''.join(random.choices(string.digits, k=6))
             hashed_otp = self._hash_otp(otp)
 
-            redis_cache.set_cache(f"email_otp:{email}", {"otp": hashed_otp}, OTP_EXPIRY_SECONDS)
-
-            otp_request_count_key = f"otp_requests:{email}"
-            redis_cache.set_value(otp_request_count_key, int(redis_cache.get_value(otp_request_count_key) or 0) + 1, 86400)
-
-            last_request_key = f"otp_last_request:{email}"
-            redis_cache.set_value(last_request_key, "1", OTP_RESEND_COOLDOWN)
+            # Limit check, cooldown and OTP write happen in one atomic round trip
+            request_count = redis_cache.throttled_set_cache(
+                f"email_otp:{email}", {"otp": hashed_otp}, OTP_EXPIRY_SECONDS,
+                counter_key=f"otp_requests:{email}", limit=OTP_REQUEST_LIMIT, window=86400,
+                cooldown_key=f"otp_last_request:{email}", cooldown=OTP_RESEND_COOLDOWN
+            )
+            if request_count is None:
+                raise RuntimeError("OTP could not be stored")
+            if request_count < 0:
+                logger.warning(f"OTP {'request limit exceeded' if request_count == -1 else 'cooldown active'} for {email}")
+                raise HTTPException(status_code=429, detail="Too many OTP requests. Try again later.")
 
             logger.info(f"Generated OTP for {email}: {otp} (valid for {OTP_EXPIRY_SECONDS // 60} mins)")
             return otp
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating OTP for {email}: {e}")
             raise HTTPException(status_code=500, detail="Error generating OTP")
@@ -119,13 +103,18 @@ class EmailUtils:
             </html>
             """
             self._send_email(email, subject, body, True)
+        except HTTPException as e:
+            if e.status_code == 429:
+                raise
+            logger.error(f"Error sending OTP email to {email}: {e.detail}")
+            raise HTTPException(status_code=500, detail="Error sending OTP email")
         except Exception as e:
             logger.error(f"Error sending OTP email to {email}: {e}")
             raise HTTPException(status_code=500, detail="Error sending OTP email")
 
-    def verify_email_otp(self, email: str, otp: str, response: Response) -> JSONResponse:
+    async def verify_email_otp(self, email: str, otp: str, response: Response) -> JSONResponse:
         try:
-            stored_data = (redis_cache.get_cache(f"email_otp:{email}") or {}).get("data")
+            stored_data = (await redis_cache.get_cache_async(f"email_otp:{email}") or {}).get("data")
             logger.info(f"email: {email} and data: {stored_data}")
             
             if stored_data:
@@ -133,10 +122,10 @@ class EmailUtils:
                 logger.info(f"{otp}")
                 
                 if stored_otp_hashed and stored_otp_hashed == self._hash_otp(otp):
-                    redis_cache.delete_key(f"email_otp:{email}")
+                    await redis_cache.delete_key_async(f"email_otp:{email}")
                     logger.info(f"OTP verified successfully for {email}")
 
-                    self.user_collection.update_one({"email": email}, {"$set": {"verified": True}})
+                    await self.async_user_collection.update_one({"email": email}, {"$set": {"verified": True}})
         
                     access_token = security_utils.create_access_token(data={"sub": email})
                     refresh_token = security_utils.create_refresh_token(data={"sub": email})